@@ -4,25 +4,74 @@ Port: 8010
 Capabilities: agent coordination, service discovery, UI hosting, routing
 """
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse, FileResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, RedirectResponse, Response, StreamingResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Dict, List, Optional
+from cachetools import LRUCache, TTLCache
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
 import httpx
 import asyncio
+import hashlib
+import logging
+import orjson
 import os
+import re
+import time
+
+
+class _ErrorRateLimitFilter(logging.Filter):
+    """Drop ERROR records beyond `rate` per second so error storms cannot flood the log"""
+    
+    def __init__(self, rate: int = 10):
+        super().__init__()
+        self.rate = rate
+        self._window = 0
+        self._count = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno < logging.ERROR:
+            return True
+        window = int(record.created)
+        if window != self._window:
+            self._window, self._count = window, 0
+        self._count += 1
+        return self._count <= self.rate
+
+
+# One stream handler for the process; %-style arguments are only formatted when a record is emitted
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+logger.addFilter(_ErrorRateLimitFilter())
 
 # Semantic Kernel imports
 try:
+    import numpy as np
     import semantic_kernel as sk
-    from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+    from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureTextEmbedding
+    from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
+        AzureChatPromptExecutionSettings,
+    )
+    from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
     from semantic_kernel.contents.chat_history import ChatHistory
+    from semantic_kernel.contents.utils.author_role import AuthorRole
     SK_AVAILABLE = True
-    print("✅ Semantic Kernel successfully imported!")
+    logger.info("✅ Semantic Kernel successfully imported!")
 except ImportError as e:
     SK_AVAILABLE = False
-    print(f"❌ Semantic Kernel not available: {e}")
+    logger.warning("❌ Semantic Kernel not available: %s", e)
+
+# Optional shared cache tier for multi-worker deployments
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Load environment variables before anything reads them (OrchestratorService.__init__ included)
+load_dotenv()
 
 # Import our custom plugins
 try:
@@ -36,85 +85,70 @@ try:
     PLUGINS_AVAILABLE = True
 except ImportError as e:
     PLUGINS_AVAILABLE = False
-    print(f"⚠️ Custom plugins not available: {e}")
+    logger.warning("⚠️ Custom plugins not available: %s", e)
 
-app = FastAPI(title="OrchestratorAgent", version="1.0.0")
+# Conversation turns (user + assistant) kept per session besides the system prompt
+MAX_HISTORY_TURNS = 8
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+# Symbols streamed by /stream/prices when the client doesn't pass any
+DEFAULT_STREAM_SYMBOLS = "AAPL,MSFT,LLOY.L,SHEL,TSLA"
+
+# Longest chat message accepted by the API and sent to the model
+MAX_MESSAGE_CHARS = 4000
+
+# Canned answers for messages that need no model call (matched after normalization)
+_GREETINGS = frozenset({"hi", "hello", "hey", "hi there", "hello there", "good morning", "good afternoon", "good evening"})
+_HELP_REQUESTS = frozenset({"help", "what can you do", "what can you help with", "how does this work"})
+_GREETING_REPLY = (
+    "👋 Hello! I'm your AI portfolio assistant. Ask me for live stock prices, a portfolio analysis, "
+    "a rebalancing plan, market sentiment or your transaction history."
+)
+_HELP_REPLY = (
+    "🤖 I can help with:\n"
+    "📈 **Stock prices** - e.g. \"What's the price of AAPL?\"\n"
+    "💼 **Portfolio analysis** - value, allocation and performance of your positions\n"
+    "⚖️ **Rebalancing** - e.g. \"Rebalance my portfolio to 60% stocks\"\n"
+    "📊 **Market insights and sentiment** for your holdings\n"
+    "💰 **Transaction history and cost basis**"
 )
 
-# Mount static files
-static_path = "/app/static"
-if os.path.exists(static_path):
-    app.mount("/static", StaticFiles(directory=static_path), name="static")
-else:
-    # Fallback for local development
-    local_static_path = "/Users/milanjugovic/a2a-milan/static"
-    if os.path.exists(local_static_path):
-        app.mount("/static", StaticFiles(directory=local_static_path), name="static")
+# Words that name no entity. Two queries share a semantic-cache answer only when everything else
+# (tickers, numbers, any other word) is identical, since "price of MSFT" and "price of AAPL"
+# embed almost identically
+_QUERY_WORDS = frozenset({
+    "a", "an", "the", "of", "for", "on", "in", "at", "to", "and", "is", "are", "what", "what's",
+    "whats", "how", "much", "does", "do", "me", "please", "show", "tell", "give", "get", "check",
+    "current", "currently", "latest", "now", "today", "today's", "price", "prices", "stock",
+    "stocks", "share", "shares", "quote", "quotes", "trading", "worth",
+})
+_QUERY_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9.&'-]*")
 
-# Data Models
-class ChatMessage(BaseModel):
-    message: str
-    session_id: str = "default"
 
-class AgentInfo(BaseModel):
-    name: str
-    url: str
-    status: str
-    capabilities: List[str]
+def _query_entities(query: str) -> frozenset:
+    """Tickers, numbers and other distinguishing words of a normalized query"""
+    return frozenset(token.rstrip(".") for token in _QUERY_TOKEN_RE.findall(query)) - _QUERY_WORDS
 
-class OrchestratorService:
-    def __init__(self):
-        # Get agent URLs from environment (use full URLs from Azure Container Apps)
-        pricing_url = os.getenv("PRICING_AGENT_URL")
-        rebalance_url = os.getenv("REBALANCE_AGENT_URL")
-        
-        # Fallback to local URLs if environment variables not set
-        if not pricing_url:
-            pricing_port = os.getenv("PRICING_AGENT_PORT", "8011")  # Updated to match current pricing service port
-            agent_host = os.getenv("AGENT_HOST", "127.0.0.1")
-            pricing_url = f"http://{agent_host}:{pricing_port}"
-            
-        if not rebalance_url:
-            rebalance_port = os.getenv("REBALANCE_AGENT_PORT", "8012")
-            agent_host = os.getenv("AGENT_HOST", "127.0.0.1")
-            rebalance_url = f"http://{agent_host}:{rebalance_port}"
-        
-        self.agents = {
-            "pricing": pricing_url,
-            "rebalance": rebalance_url
-        }
-        self.agent_info = {}
-        
-        # Per-session chat histories (CRITICAL: Don't share history between users!)
-        self.chat_histories = {}
-        
-        # Simple response cache for performance optimization
-        self.response_cache = {}
-        self.cache_ttl = 300  # 5 minutes cache
-        
-        # Semantic Kernel setup
-        self.kernel = None
-        self.chat_service = None
-        
-        # Initialize Semantic Kernel with plugins if available
-        if SK_AVAILABLE and PLUGINS_AVAILABLE:
-            self._initialize_semantic_kernel()
-    
-    def get_or_create_chat_history(self, session_id: str):
-        """Get or create a chat history for a specific session"""
-        if session_id not in self.chat_histories:
-            chat_history = ChatHistory()
-            
-            # Add system message with instructions
-            chat_history.add_system_message("""You are an AI-powered Financial Advisor and Portfolio Management Assistant with access to comprehensive transaction history.
+# Plugins registered on the kernel at startup
+EXPECTED_PLUGIN_COUNT = 5
+
+# Framed chat tokens buffered between the LLM stream and a slow client
+CHAT_STREAM_QUEUE_SIZE = 32
+
+# Seconds agent discovery results are served from memory before re-probing
+DISCOVERY_TTL = 30.0
+
+# Seconds between price polls, and events buffered per streaming client
+PRICE_POLL_INTERVAL = 10
+PRICE_QUEUE_SIZE = 32
+
+
+def _sse_event(payload) -> bytes:
+    """Frame a payload as a Server-Sent Event; bytes go to the socket without a str round trip"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+# System prompt shared by every chat session. Keep it static (no f-strings or per-user data) and
+# above 1024 tokens so Azure OpenAI prompt caching can reuse the prefix across turns and sessions.
+_SYSTEM_PROMPT = """You are an AI-powered Financial Advisor and Portfolio Management Assistant with access to comprehensive transaction history.
 
 **Your Enhanced Capabilities:**
 - Get real-time stock prices for any publicly traded company (use get_stock_price function)
@@ -125,6 +159,18 @@ class OrchestratorService:
 - Analyze market sentiment for stocks (use analyze_market_sentiment function)
 - Access transaction history for specific symbols (use get_transaction_history function)
 
+**Function Calling Guidelines:**
+- When users ask about stock prices, ALWAYS use get_stock_price or get_multiple_stock_prices
+- When users ask about their transaction history, purchases, or "when did I buy", use get_transaction_history
+- When users ask about performance, gains/losses, or P&L, use analyze_position_performance
+- When users ask about cost basis or average cost, use get_cost_basis_info
+- When users ask about market sentiment, news, or market conditions, use analyze_market_sentiment
+- When users ask about overall portfolio sentiment or market outlook, use get_portfolio_sentiment_overview
+- When users ask about news impact on their investments, use get_market_news_impact
+- When users mention their holdings or ask about portfolio value, use analyze_portfolio_value
+- When users ask about rebalancing or want trade recommendations, use create_rebalancing_plan
+- For conceptual questions, use get_market_context or answer directly
+
 **Built-in Portfolio Data:**
 You have access to realistic transaction history:
 - AAPL: 2 purchases (75 shares @ $225.50, 75 shares @ $235.80) = 150 shares
@@ -167,39 +213,241 @@ You should call: create_rebalancing_plan(
 - When functions return HTML (like analyze_portfolio_value), return it directly - do NOT add extra text
 - Always cite data sources when providing real-time information
 
-**Important:** You have access to real-time market data and AI-powered portfolio analysis. Use your functions proactively!""")
+**Important:** You have access to real-time market data and AI-powered portfolio analysis. Use your functions proactively!"""
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the orchestrator inside each worker process and release it on shutdown"""
+    await orchestrator_service.startup()
+    # startup() only builds a client when orchestrator_service.http_client is unset, so a mock set
+    # there beforehand is used as-is; app.state just mirrors whichever client the worker ended up with
+    app.state.http_client = orchestrator_service.http_client
+    yield
+    await orchestrator_service.shutdown()
+
+app = FastAPI(title="OrchestratorAgent", version="1.0.0", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+# Add CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Mount static files - container path first, then local development fallback
+STATIC_DIRS = [p for p in ("/app/static", "/Users/milanjugovic/a2a-milan/static") if os.path.exists(p)]
+if STATIC_DIRS:
+    app.mount("/static", StaticFiles(directory=STATIC_DIRS[0]), name="static")
+
+# Data Models
+class ChatMessage(BaseModel):
+    # Oversized payloads are rejected with a 422 before they reach the service
+    message: str = Field(..., max_length=MAX_MESSAGE_CHARS)
+    session_id: str = "default"
+
+class AgentInfo(BaseModel):
+    name: str
+    url: str
+    status: str
+    capabilities: List[str]
+
+class OrchestratorService:
+    def __init__(self):
+        env = os.environ
+        
+        # Get agent URLs from environment (use full URLs from Azure Container Apps)
+        pricing_url = env.get("PRICING_AGENT_URL")
+        rebalance_url = env.get("REBALANCE_AGENT_URL")
+        
+        # Fallback to local URLs if environment variables not set
+        agent_host = env.get("AGENT_HOST", "127.0.0.1")
+        if not pricing_url:
+            pricing_port = env.get("PRICING_AGENT_PORT", "8011")  # Updated to match current pricing service port
+            pricing_url = f"http://{agent_host}:{pricing_port}"
+            
+        if not rebalance_url:
+            rebalance_port = env.get("REBALANCE_AGENT_PORT", "8012")
+            rebalance_url = f"http://{agent_host}:{rebalance_port}"
+        
+        self.agents = {
+            "pricing": pricing_url,
+            "rebalance": rebalance_url
+        }
+        self.agent_info = {}
+        
+        # Discovery results (cards + health) served from memory and refreshed in the background,
+        # so /agents and /discover don't cost 2N upstream requests per hit
+        self.agent_health: Dict[str, dict] = {}
+        self._discovery_ttl = DISCOVERY_TTL
+        self._discovery_ts = 0.0
+        self._discovery_task = None
+        
+        # Per-session chat histories (CRITICAL: Don't share history between users!)
+        # LRU-bounded so idle sessions are evicted instead of accumulating forever
+        self.chat_histories = LRUCache(maxsize=10_000)
+        
+        # Simple response cache for performance optimization (TTL + LRU eviction)
+        self.cache_ttl = 300  # 5 minutes cache
+        self.response_cache = TTLCache(maxsize=1024, ttl=self.cache_ttl)
+        
+        # Shared Redis tier behind the local cache so workers reuse each other's answers (REDIS_URL)
+        self.redis = None
+        
+        # Semantic cache tier: unit-norm query embeddings, one row per cache key in response_cache,
+        # so paraphrased short queries ("price of AAPL" / "AAPL price") reuse a cached answer
+        self.embed_service = None
+        self.semantic_cache_size = 512
+        self.semantic_cache_threshold = float(env.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+        self._semantic_keys: List[str] = []
+        self._semantic_entities: List[frozenset] = []
+        self._semantic_matrix = None
+        
+        # Shared HTTP client - created per worker in startup()
+        self.http_client = None
+        
+        # Semantic Kernel setup
+        self.kernel = None
+        self.chat_service = None
+        self._chat_settings = None
+        self._azure_cfg = {}
+        self._plugins = []  # Plugin instances, kept so their HTTP clients can be closed on shutdown
+        
+        # Messages answered by _fast_path without touching the kernel or caches
+        self.fast_path_hits = 0
+        
+        # In-flight chat completions keyed by cache key (request coalescing)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        
+        # Cap concurrent Azure OpenAI calls across all sessions to stay inside the deployment quota
+        self._llm_slots = asyncio.Semaphore(int(env.get("AZURE_OPENAI_MAX_CONCURRENCY", "8")))
+        
+        # Price pub/sub: one poller task per worker feeds a queue per /stream/prices client,
+        # so upstream load is independent of how many browsers are connected
+        self._price_subscribers: Dict[asyncio.Queue, frozenset] = {}
+        self._price_wanted = asyncio.Event()
+        self._latest_prices = TTLCache(maxsize=256, ttl=2 * PRICE_POLL_INTERVAL)
+        self._price_task = None
+    
+    async def startup(self):
+        """Create per-worker resources (HTTP pool, Semantic Kernel) inside the worker process"""
+        # Shared HTTP client - reuses pooled keep-alive connections to the agents
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(30.0, connect=5.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        
+        # Background price poller for /stream/prices
+        if self._price_task is None:
+            self._price_task = asyncio.create_task(self._price_poller())
+        
+        # Background agent discovery refresh for /agents and /discover
+        if self._discovery_task is None:
+            self._discovery_task = asyncio.create_task(self._discovery_refresher())
+        
+        # Initialize Semantic Kernel with plugins if available
+        if SK_AVAILABLE and PLUGINS_AVAILABLE:
+            self._initialize_semantic_kernel()
+        
+        # Pre-connect the plugin clients so the first chat doesn't pay connection setup
+        warmups = [plugin.warmup() for plugin in self._plugins if hasattr(plugin, "warmup")]
+        if warmups:
+            await asyncio.gather(*warmups)
+        
+        # Shared response cache, only when configured so local dev needs no Redis
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url and self.redis is None:
+            if REDIS_AVAILABLE:
+                self.redis = aioredis.Redis.from_url(redis_url)
+                logger.info("✅ Shared Redis response cache enabled")
+            else:
+                logger.warning("⚠️ REDIS_URL is set but the redis package is not installed")
+    
+    async def shutdown(self):
+        """Release per-worker resources"""
+        for task in (self._price_task, self._discovery_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._price_task = None
+        self._discovery_task = None
+        
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+        
+        # Plugins that talk to other agents own pooled HTTP clients
+        for plugin in self._plugins:
+            if hasattr(plugin, "aclose"):
+                await plugin.aclose()
+        self._plugins = []
+        
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+    
+    def get_or_create_chat_history(self, session_id: str):
+        """Get or create a chat history for a specific session"""
+        if session_id not in self.chat_histories:
+            chat_history = ChatHistory()
+            
+            # Add system message with instructions
+            chat_history.add_system_message(_SYSTEM_PROMPT)
             
             self.chat_histories[session_id] = chat_history
-            print(f"✅ Created new chat history for session: {session_id}", flush=True)
+            logger.info("✅ Created new chat history for session: %s", session_id)
             
         return self.chat_histories[session_id]
     
+    def _trim_chat_history(self, chat_history):
+        """Keep the system prompt plus the last MAX_HISTORY_TURNS turns to cap prompt tokens"""
+        messages = chat_history.messages
+        if len(messages) <= 2 + 2 * MAX_HISTORY_TURNS:
+            return
+        
+        recent = messages[-2 * MAX_HISTORY_TURNS:]
+        # Start the window on a user message so tool calls are never split from their results
+        while len(recent) > 1 and recent[0].role != AuthorRole.USER:
+            recent = recent[1:]
+        messages[:] = [messages[0]] + recent
+    
     
     def _initialize_semantic_kernel(self):
         """Initialize Semantic Kernel with Azure OpenAI and plugins"""
-        import logging
-        logger = logging.getLogger(__name__)
+        # Kernel, services and plugins are per-worker singletons - never rebuild them
+        if self.kernel is not None:
+            return
         
         try:
-            from dotenv import load_dotenv
-            load_dotenv()
-            
             # Create kernel
             self.kernel = sk.Kernel()
             logger.info("Kernel created")
             
-            # Get Azure OpenAI configuration
-            endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-            api_key = os.getenv("AZURE_OPENAI_API_KEY")
-            deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini")
-            api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01")
+            # Read Azure OpenAI configuration once; nothing on the request path touches os.environ
+            self._azure_cfg = {
+                "endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
+                "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+                "deployment": os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o-mini"),
+                "api_version": os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-01"),
+                "embedding_deployment": os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT"),
+            }
+            endpoint = self._azure_cfg["endpoint"]
+            api_key = self._azure_cfg["api_key"]
+            deployment = self._azure_cfg["deployment"]
+            api_version = self._azure_cfg["api_version"]
             
             if not endpoint or not api_key:
-                print("❌ Azure OpenAI configuration missing. Set AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY")
+                logger.error("❌ Azure OpenAI configuration missing. Set AZURE_OPENAI_ENDPOINT and AZURE_OPENAI_API_KEY")
                 return
             
-            print(f"🔑 Azure OpenAI Endpoint: {endpoint}")
-            print(f"🚀 Deployment: {deployment}")
+            logger.info("🔑 Azure OpenAI Endpoint: %s", endpoint)
+            logger.info("🚀 Deployment: %s", deployment)
             
             # Add Azure OpenAI chat completion service
             self.chat_service = AzureChatCompletion(
@@ -211,63 +459,245 @@ You should call: create_rebalancing_plan(
             )
             self.kernel.add_service(self.chat_service)
             
-            print("✅ Azure OpenAI service added to kernel")
+            # Optional embedding deployment for the semantic response cache
+            embedding_deployment = self._azure_cfg["embedding_deployment"]
+            if embedding_deployment:
+                self.embed_service = AzureTextEmbedding(
+                    service_id="embedding",
+                    deployment_name=embedding_deployment,
+                    endpoint=endpoint,
+                    api_key=api_key,
+                    api_version=api_version,
+                )
+                logger.info("✅ Semantic cache enabled with embedding deployment: %s", embedding_deployment)
             
-            # Add our custom plugins to the kernel
+            # Chat settings are static - build them (and FunctionChoiceBehavior) once
+            self._chat_settings = AzureChatPromptExecutionSettings(
+                service_id="chat",
+                max_tokens=400,  # Further reduced for 10 TPM quota
+                temperature=0.1,  # Very low for fastest responses
+                function_choice_behavior=FunctionChoiceBehavior.Auto()  # Enable auto function calling!
+            )
+            
+            logger.info("✅ Azure OpenAI service added to kernel")
+            
+            # Add our custom plugins to the kernel. Each instance is tracked in _plugins as soon as it
+            # is built, so shutdown() closes its HTTP client even if a later step fails
             if PLUGINS_AVAILABLE:
                 # Add stock pricing plugin
                 pricing_plugin = StockPricingPlugin(self.agents["pricing"])
+                self._plugins.append(pricing_plugin)
                 self.kernel.add_plugin(pricing_plugin, plugin_name="StockPricingPlugin")
-                print("✅ StockPricingPlugin added")
+                logger.info("✅ StockPricingPlugin added")
                 
                 # Add portfolio rebalancing plugin
                 rebalancing_plugin = PortfolioRebalancingPlugin(self.agents["rebalance"])
+                self._plugins.append(rebalancing_plugin)
                 self.kernel.add_plugin(rebalancing_plugin, plugin_name="PortfolioRebalancingPlugin")
-                print("✅ PortfolioRebalancingPlugin added")
+                logger.info("✅ PortfolioRebalancingPlugin added")
                 
                 # Add market insights plugin
-                insights_plugin = MarketInsightsPlugin(self.agents["pricing"])
+                insights_plugin = MarketInsightsPlugin()
+                self._plugins.append(insights_plugin)
                 self.kernel.add_plugin(insights_plugin, plugin_name="MarketInsightsPlugin")
-                print("✅ MarketInsightsPlugin added")
+                logger.info("✅ MarketInsightsPlugin added")
                 
                 # Add transaction history plugin
                 history_plugin = TransactionHistoryPlugin()
+                self._plugins.append(history_plugin)
                 self.kernel.add_plugin(history_plugin, plugin_name="TransactionHistoryPlugin")
-                print("✅ TransactionHistoryPlugin added")
+                logger.info("✅ TransactionHistoryPlugin added")
                 
                 # Add market sentiment plugin
                 sentiment_plugin = MarketSentimentPlugin()
+                self._plugins.append(sentiment_plugin)
                 self.kernel.add_plugin(sentiment_plugin, plugin_name="MarketSentimentPlugin")
-                print("✅ MarketSentimentPlugin added")
+                logger.info("✅ MarketSentimentPlugin added")
                 
-                print(f"🎯 Total plugins loaded: {len(self.kernel.plugins)}")
+                logger.info("🎯 Total plugins loaded: %d", len(self.kernel.plugins))
+                if len(self.kernel.plugins) != EXPECTED_PLUGIN_COUNT:
+                    logger.warning("⚠️ Expected %d plugins, loaded %d", EXPECTED_PLUGIN_COUNT, len(self.kernel.plugins))
             
         except Exception as e:
-            print(f"❌ Failed to initialize Semantic Kernel: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Failed to initialize Semantic Kernel: %s", e)
     
     async def route_chat_message(self, message: str, session_id: str = "default"):
         """
         Route chat messages using Semantic Kernel with auto function calling.
         The AI will automatically decide when to call pricing or rebalancing functions.
         """
-        print(f"🔄 Processing message for session {session_id}: {message[:50]}...", flush=True)
+        logger.info("🔄 Processing message for session %s: %.50s...", session_id, message)
+        
+        # Trivial and rejected inputs are answered before any cache lookup or LLM call
+        fast_reply = self._fast_path(message)
+        if fast_reply is not None:
+            return {"response": fast_reply, "session_id": session_id, "agent": "OrchestratorAgent"}
+        
+        query, fingerprint, cache_key = self._cache_keys(message, session_id)
+        cached_response, embedding = await self._cache_lookup(message, query, fingerprint, cache_key)
+        if cached_response is not None:
+            return {**cached_response, "session_id": session_id}  # Update session ID
+        
+        if len(message) >= 100:  # Only short queries are cached, so only those are coalesced
+            return await self._complete_chat(message, session_id, cache_key)
+        
+        # Coalesce identical in-flight queries: later callers await the first caller's task
+        # instead of sending a duplicate request to Azure OpenAI
+        task = self._inflight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._complete_chat(message, session_id, cache_key))
+            self._inflight[cache_key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        else:
+            logger.info("🔗 Joining in-flight request for message: %.30s...", message)
+        
+        # shield() keeps the shared task running if this particular client disconnects
+        result = await asyncio.shield(task)
+        if embedding is not None and cache_key in self.response_cache:
+            self._semantic_remember(cache_key, embedding)
+        return {**result, "session_id": session_id}
+    
+    def _cache_keys(self, message: str, session_id: str):
+        """(normalized query, history fingerprint, cache key) for a message"""
+        # Normalized message is the key - dicts hash strings natively, no digest needed.
+        # Only short messages are ever cached, so truncating long keys cannot cause false hits.
+        # Once a session has turns, the answer depends on them, so the key carries a fingerprint
+        # of the history and only an identical conversation can reuse it
+        query = message.strip().lower()[:256]
+        fingerprint = self._history_fingerprint(session_id)
+        cache_key = f"{fingerprint}:{query}" if fingerprint else query
+        return query, fingerprint, cache_key
+    
+    async def _cache_lookup(self, message: str, query: str, fingerprint: str, cache_key: str):
+        """Check the local, shared and semantic tiers; returns (cached response, query embedding to index on a miss)"""
+        # TTLCache drops expired entries itself, so a hit is always fresh
+        cached_response = self.response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info("⚡ Cache hit for message: %.30s...", message)
+            return cached_response, None
+        
+        if len(message) >= 100:  # Only short queries are cached
+            return None, None
+        
+        # Local miss - another worker may already have answered it
+        if self.redis is not None:
+            cached_response = await self._shared_cache_get(cache_key)
+            if cached_response is not None:
+                logger.info("⚡ Shared cache hit for message: %.30s...", message)
+                self.response_cache[cache_key] = cached_response
+                return cached_response, None
+        
+        # Exact miss - fall back to the embedding-similarity tier, for history-independent
+        # queries only (first message of a session)
+        embedding = None
+        if self.embed_service is not None and not fingerprint:
+            embedding, cached_response = await self._semantic_lookup(query)
+            if cached_response is not None:
+                logger.info("⚡ Semantic cache hit for message: %.30s...", message)
+                return cached_response, embedding
+        
+        return None, embedding
+    
+    async def _cache_store(self, message: str, cache_key: str, result: dict):
+        """Cache a completed answer locally and in Redis (only short queries)"""
+        if len(message) < 100:
+            self.response_cache[cache_key] = result
+            if self.redis is not None:
+                await self._shared_cache_set(cache_key, result)
+    
+    def _history_fingerprint(self, session_id: str) -> str:
+        """'' for a session with no turns yet, else a digest of its conversation so far"""
+        chat_history = self.chat_histories.get(session_id)
+        if chat_history is None or len(chat_history.messages) <= 1:
+            return ""
+        digest = hashlib.blake2b(digest_size=8)
+        for chat_message in chat_history.messages[1:]:
+            digest.update(f"{chat_message.role.value}\0{chat_message.content}\0".encode())
+        return digest.hexdigest()
+    
+    async def _shared_cache_get(self, cache_key: str) -> Optional[dict]:
+        """Look a response up in Redis; cache errors degrade to a miss"""
+        try:
+            value = await self.redis.get(f"chat:{cache_key}")
+        except Exception as e:
+            logger.warning("⚠️ Redis get failed: %s", e)
+            return None
+        return orjson.loads(value) if value is not None else None
+    
+    async def _shared_cache_set(self, cache_key: str, result: dict):
+        """Store a response in Redis with the same TTL as the local cache"""
+        try:
+            await self.redis.set(f"chat:{cache_key}", orjson.dumps(result), ex=self.cache_ttl)
+        except Exception as e:
+            logger.warning("⚠️ Redis set failed: %s", e)
+    
+    async def _semantic_lookup(self, cache_key: str):
+        """Embed a query and return (embedding, cached response of the most similar cached query)"""
+        try:
+            vectors = await self.embed_service.generate_embeddings([cache_key])
+        except Exception as e:
+            logger.warning("⚠️ Embedding failed, skipping semantic cache: %s", e)
+            return None, None
         
-        # Check cache for quick responses (for simple price queries)
-        import hashlib
-        import time
+        embedding = np.asarray(vectors[0], dtype=np.float32)
+        norm = np.linalg.norm(embedding)
+        if norm == 0:
+            return None, None
+        embedding /= norm
         
-        cache_key = hashlib.md5(f"{message.lower().strip()}".encode()).hexdigest()
-        current_time = time.time()
+        if self._semantic_matrix is not None:
+            # Rows are unit vectors, so one matrix-vector product gives every cosine similarity.
+            # Similar enough is not sufficient: the best candidate naming exactly the same
+            # tickers and numbers wins
+            similarities = self._semantic_matrix @ embedding
+            candidates = np.flatnonzero(similarities > self.semantic_cache_threshold)
+            entities = _query_entities(cache_key)
+            for row in candidates[np.argsort(-similarities[candidates])].tolist():
+                if self._semantic_entities[row] != entities:
+                    continue
+                cached = self.response_cache.get(self._semantic_keys[row])
+                if cached is not None:
+                    return embedding, cached
+        
+        return embedding, None
+    
+    def _semantic_remember(self, cache_key: str, embedding):
+        """Index a cached response's query embedding, dropping rows whose response has expired"""
+        if cache_key in self._semantic_keys:
+            return
         
-        if cache_key in self.response_cache:
-            cached_response, cached_time = self.response_cache[cache_key]
-            if current_time - cached_time < self.cache_ttl:
-                print(f"⚡ Cache hit for message: {message[:30]}...", flush=True)
-                cached_response["session_id"] = session_id  # Update session ID
-                return cached_response
+        rows = [i for i, key in enumerate(self._semantic_keys) if key in self.response_cache]
+        rows = rows[-(self.semantic_cache_size - 1):]
+        keys = [self._semantic_keys[i] for i in rows] + [cache_key]
+        entities = [self._semantic_entities[i] for i in rows] + [_query_entities(cache_key)]
         
+        if rows:
+            self._semantic_matrix = np.vstack([self._semantic_matrix[rows], embedding[None, :]])
+        else:
+            self._semantic_matrix = embedding[None, :]
+        self._semantic_keys = keys
+        self._semantic_entities = entities
+    
+    def _fast_path(self, message: str) -> Optional[str]:
+        """Return a canned reply for empty, greeting or help messages, else None"""
+        # Overlong messages never get here - ChatMessage rejects them with a 422
+        text = message.strip()
+        if not text:
+            reply = "👋 Please type a question about stock prices, your portfolio or rebalancing."
+        else:
+            normalized = text.lower().rstrip("!?. ")
+            if normalized in _GREETINGS:
+                reply = _GREETING_REPLY
+            elif normalized in _HELP_REQUESTS:
+                reply = _HELP_REPLY
+            else:
+                return None
+        
+        self.fast_path_hits += 1
+        return reply
+    
+    async def _complete_chat(self, message: str, session_id: str, cache_key: str):
+        """Run the Semantic Kernel completion for a message and cache short-query results"""
         try:
             # Check if SK is available
             if self.kernel is None or self.chat_service is None:
@@ -282,42 +712,24 @@ You should call: create_rebalancing_plan(
             
             # Add user message to history
             chat_history.add_user_message(message)
-            print(f"✅ Added message to session {session_id} history (total messages: {len(chat_history.messages)})", flush=True)
-            
-            # Create execution settings for Azure OpenAI with performance optimizations
-            from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
-                AzureChatPromptExecutionSettings,
-            )
-            
-            execution_settings = AzureChatPromptExecutionSettings(
-                service_id="chat",
-                max_tokens=400,  # Further reduced for 10 TPM quota
-                temperature=0.1,  # Very low for fastest responses
-                top_p=0.8
-            )
-            
-            
-            print(f"🤖 Invoking AI with {len(self.kernel.plugins)} plugins available...", flush=True)
+            self._trim_chat_history(chat_history)
+            # Counts are diagnostics only - skip the lookups unless debug logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("✅ Added message to session %s history (total messages: %d)", session_id, len(chat_history.messages))
+                logger.debug("🤖 Invoking AI with %d plugins available...", len(self.kernel.plugins))
             
-            # For SK 1.37, use get_chat_message_contents with execution settings
-            from semantic_kernel.connectors.ai.open_ai.prompt_execution_settings.azure_chat_prompt_execution_settings import (
-                AzureChatPromptExecutionSettings,
-            )
-            from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoiceBehavior
-            
-            settings = AzureChatPromptExecutionSettings(
-                service_id="chat",
-                max_tokens=400,  # Further reduced for 10 TPM quota
-                temperature=0.1,  # Very low for fastest responses
-                function_choice_behavior=FunctionChoiceBehavior.Auto()  # Enable auto function calling!
-            )
+            # For SK 1.37, use get_chat_message_contents with execution settings.
+            # Shallow copy per call: SK writes tools/tool_choice onto the settings during
+            # auto function calling, and user=session_id keeps prompt-cache routing sticky.
+            settings = self._chat_settings.model_copy(update={"user": session_id})
             
             # Call the completion service with auto function calling
-            response = await self.chat_service.get_chat_message_contents(
-                chat_history=chat_history,
-                settings=settings,
-                kernel=self.kernel
-            )
+            async with self._llm_slots:
+                response = await self.chat_service.get_chat_message_contents(
+                    chat_history=chat_history,
+                    settings=settings,
+                    kernel=self.kernel
+                )
             
             # Get the response text
             if response and len(response) > 0:
@@ -326,7 +738,7 @@ You should call: create_rebalancing_plan(
                 # Add assistant response to chat history
                 chat_history.add_assistant_message(response_text)
                 
-                print(f"✅ AI response generated: {response_text[:50]}...", flush=True)
+                logger.info("✅ AI response generated: %.50s...", response_text)
                 
                 result = {
                     "response": response_text,
@@ -335,8 +747,7 @@ You should call: create_rebalancing_plan(
                 }
                 
                 # Cache the response for performance (only simple queries)
-                if len(message) < 100:  # Only cache short queries
-                    self.response_cache[cache_key] = (result, current_time)
+                await self._cache_store(message, cache_key, result)
                 
                 return result
             else:
@@ -347,94 +758,280 @@ You should call: create_rebalancing_plan(
                 }
                 
         except Exception as e:
-            print(f"❌ Error in AI processing: {e}", flush=True)
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ AI error for session %s", session_id)
             return {
                 "response": f"🤖 I encountered an error: {str(e)}. Please try again.",
                 "session_id": session_id,
                 "agent": "OrchestratorAgent_Error"
             }
 
+    async def stream_chat_message(self, message: str, session_id: str = "default"):
+        """
+        Stream the AI response as Server-Sent Events while it is generated.
+        Emits {"delta": ...} events per token chunk, then a final {"done": true, ...} event.
+        Cached and coalesced answers are replayed as a single {"response": ..., "done": true} event.
+        """
+        logger.info("🔄 Streaming message for session %s: %.50s...", session_id, message)
+        
+        fast_reply = self._fast_path(message)
+        if fast_reply is not None:
+            yield _sse_event({"response": fast_reply, "session_id": session_id, "agent": "OrchestratorAgent", "done": True})
+            return
+        
+        if self.kernel is None or self.chat_service is None:
+            unavailable = {
+                "response": "🤖 AI service is not available. Please check configuration.",
+                "session_id": session_id,
+                "agent": "OrchestratorAgent",
+                "done": True
+            }
+            yield _sse_event(unavailable)
+            return
+        
+        # Same cache tiers as route_chat_message; a hit is replayed as one chunk
+        query, fingerprint, cache_key = self._cache_keys(message, session_id)
+        cached_response, embedding = await self._cache_lookup(message, query, fingerprint, cache_key)
+        if cached_response is not None:
+            yield _sse_event({**cached_response, "session_id": session_id, "done": True})
+            return
+        
+        # Another request is already generating this answer - wait for it instead of a second LLM call
+        coalesce = len(message) < 100
+        task = self._inflight.get(cache_key) if coalesce else None
+        if task is not None:
+            logger.info("🔗 Joining in-flight request for message: %.30s...", message)
+            result = await asyncio.shield(task)
+            yield _sse_event({**result, "session_id": session_id, "done": True})
+            return
+        
+        chat_history = self.get_or_create_chat_history(session_id)
+        chat_history.add_user_message(message)
+        self._trim_chat_history(chat_history)
+        
+        settings = self._chat_settings.model_copy(update={"user": session_id})
+        
+        # Producer/consumer split: the producer keeps pulling tokens from Azure OpenAI while the
+        # generator below writes to the client, so a slow socket doesn't stall the LLM stream
+        frames = asyncio.Queue(maxsize=CHAT_STREAM_QUEUE_SIZE)
+        
+        async def produce():
+            parts = []
+            try:
+                # Auto function calling also works on the streaming API; tool-call chunks carry no text
+                async with self._llm_slots:
+                    async for chunks in self.chat_service.get_streaming_chat_message_contents(
+                        chat_history=chat_history,
+                        settings=settings,
+                        kernel=self.kernel
+                    ):
+                        for chunk in chunks:
+                            text = str(chunk)
+                            if text:
+                                parts.append(text)
+                                await frames.put(_sse_event({'delta': text}))
+                
+                response_text = "".join(parts)
+                chat_history.add_assistant_message(response_text)
+                logger.info("✅ AI response streamed: %.50s...", response_text)
+                
+                # Write the finished answer back so the next ask is a cache hit
+                result = {
+                    "response": response_text,
+                    "session_id": session_id,
+                    "agent": "SK_OrchestratorAgent_AutoFunctions"
+                }
+                await self._cache_store(message, cache_key, result)
+                if embedding is not None:
+                    self._semantic_remember(cache_key, embedding)
+                if answer is not None and not answer.done():
+                    answer.set_result(result)
+                
+                done = {"done": True, "session_id": session_id, "agent": "SK_OrchestratorAgent_AutoFunctions"}
+                await frames.put(_sse_event(done))
+                
+            except Exception as e:
+                logger.exception("❌ AI streaming error for session %s", session_id)
+                error_data = {
+                    "error": f"🤖 I encountered an error: {str(e)}. Please try again.",
+                    "session_id": session_id,
+                    "agent": "OrchestratorAgent_Error",
+                    "done": True
+                }
+                if answer is not None and not answer.done():
+                    answer.set_result({"response": error_data["error"], "session_id": session_id, "agent": "OrchestratorAgent_Error"})
+                await frames.put(_sse_event(error_data))
+            
+            # End-of-stream sentinel (skipped on cancellation, when nobody is reading)
+            await frames.put(None)
+        
+        # Register this stream as the in-flight request, resolved with the final answer
+        answer = asyncio.get_running_loop().create_future() if coalesce else None
+        if answer is not None:
+            self._inflight[cache_key] = answer
+            answer.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                frame = await frames.get()
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            # Client went away mid-stream - stop generating tokens nobody will read
+            if not producer.done():
+                producer.cancel()
+            # Requests that joined this stream get the apology instead of waiting forever
+            if answer is not None and not answer.done():
+                answer.set_result({
+                    "response": "🤖 I apologize, but I couldn't generate a response. Please try again.",
+                    "session_id": session_id,
+                    "agent": "SK_OrchestratorAgent_AutoFunctions"
+                })
+
     async def get_agent_health(self, agent_name: str) -> dict:
         """Check health status of an agent"""
         if agent_name not in self.agents:
             return {"status": "unknown", "agent": agent_name}
         
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(f"{self.agents[agent_name]}/health")
-                return response.json()
+            response = await self.http_client.get(f"{self.agents[agent_name]}/health", timeout=5.0)
+            return response.json()
         except Exception as e:
             return {"status": "error", "error": str(e), "agent": agent_name}
 
     async def get_stock_price_direct(self, symbol: str) -> dict:
         """Direct stock price lookup"""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(f"{self.agents['pricing']}/price/{symbol}")
-                if response.status_code == 200:
-                    return response.json()
-                else:
-                    return {"error": f"Failed to get price for {symbol}", "status_code": response.status_code}
+            response = await self.http_client.get(f"{self.agents['pricing']}/price/{symbol}")
+            if response.status_code == 200:
+                return response.json()
+            else:
+                return {"error": f"Failed to get price for {symbol}", "status_code": response.status_code}
         except Exception as e:
             return {"error": str(e)}
 
     async def get_streaming_prices(self, symbols: List[str]):
-        """Stream price updates for multiple symbols"""
+        """Stream price updates for multiple symbols from the shared price poller"""
         async def generate():
-            while True:
-                for symbol in symbols:
-                    try:
-                        async with httpx.AsyncClient(timeout=10.0) as client:
-                            response = await client.get(f"{self.agents['pricing']}/price/{symbol}")
-                            if response.status_code == 200:
-                                data = response.json()
-                                yield f"data: {response.text}\n\n"
-                    except Exception as e:
-                        error_data = {"symbol": symbol, "error": str(e)}
-                        yield f"data: {error_data}\n\n"
-                    
-                    await asyncio.sleep(2)  # 2 second delay between symbols
-                
-                await asyncio.sleep(10)  # 10 second delay before next round
+            queue = asyncio.Queue(maxsize=PRICE_QUEUE_SIZE)
+            
+            # Replay the latest known prices so a new client doesn't wait a full tick
+            for symbol in symbols:
+                event = self._latest_prices.get(symbol)
+                if event is not None and not queue.full():
+                    queue.put_nowait(event)
+            
+            self._price_subscribers[queue] = frozenset(symbols)
+            self._price_wanted.set()
+            try:
+                while True:
+                    yield await queue.get()
+            finally:
+                self._price_subscribers.pop(queue, None)
+                if not self._price_subscribers:
+                    self._price_wanted.clear()
         
         return generate()
+    
+    async def _price_poller(self):
+        """Poll the pricing agent once per tick for every subscribed symbol and fan events out"""
+        # Resolved once for the poller rather than on every tick
+        price_url = f"{self.agents['pricing']}/price/"
+        http_get = self.http_client.get
+        
+        async def fetch_event(symbol: str):
+            try:
+                response = await http_get(price_url + symbol, timeout=10.0)
+                if response.status_code == 200:
+                    # Forward the pricing agent's JSON bytes as-is - no decode/re-encode per event
+                    return symbol, b"data: " + response.content + b"\n\n"
+            except Exception as e:
+                return symbol, _sse_event({"symbol": symbol, "error": str(e)})
+            return symbol, None
+        
+        while True:
+            # Sleep until at least one /stream/prices client is connected
+            await self._price_wanted.wait()
+            try:
+                symbols = set().union(*self._price_subscribers.values())
+                
+                # Fetch all symbols concurrently and publish each price as soon as it arrives
+                for next_event in asyncio.as_completed([fetch_event(symbol) for symbol in symbols]):
+                    symbol, event = await next_event
+                    if event is None:
+                        continue
+                    self._latest_prices[symbol] = event
+                    for queue, wanted in list(self._price_subscribers.items()):
+                        if symbol in wanted and not queue.full():  # Slow clients skip to the next tick
+                            queue.put_nowait(event)
+            except Exception as e:
+                logger.exception("❌ Price poller error: %s", e)
+            
+            await asyncio.sleep(PRICE_POLL_INTERVAL)
 
-    async def discover_agents(self) -> Dict[str, AgentInfo]:
-        """Discover available agents and their capabilities"""
-        discovered = {}
+    async def discover_agents(self, force: bool = False) -> Dict[str, AgentInfo]:
+        """Discover available agents and their capabilities, served from cache unless stale or forced"""
+        if not force and self.agent_info and time.monotonic() - self._discovery_ts < self._discovery_ttl:
+            return self.agent_info
         
-        for agent_name, base_url in self.agents.items():
+        async def _probe(agent_name: str, base_url: str) -> AgentInfo:
             try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    # Get agent card
-                    card_response = await client.get(f"{base_url}/.well-known/agent-card")
-                    if card_response.status_code == 200:
-                        card = card_response.json()
-                    else:
-                        card = {}
-                    
-                    # Check health
-                    health_response = await client.get(f"{base_url}/health")
-                    health_status = "healthy" if health_response.status_code == 200 else "unhealthy"
-                    
-                    discovered[agent_name] = AgentInfo(
-                        name=card.get("name", agent_name),
-                        url=base_url,
-                        status=health_status,
-                        capabilities=card.get("capabilities", [])
-                    )
+                # Fetch agent card and health concurrently; collect failures instead of
+                # abandoning the sibling request when one of them raises
+                card_response, health_response = await asyncio.gather(
+                    self.http_client.get(f"{base_url}/.well-known/agent-card", timeout=5.0),
+                    self.http_client.get(f"{base_url}/health", timeout=5.0),
+                    return_exceptions=True
+                )
+                if isinstance(health_response, Exception):
+                    raise health_response
+                
+                try:
+                    self.agent_health[agent_name] = health_response.json()
+                except ValueError:
+                    self.agent_health[agent_name] = {"status": "unhealthy", "agent": agent_name}
+                
+                # A missing card doesn't make a reachable agent unhealthy
+                if not isinstance(card_response, Exception) and card_response.status_code == 200:
+                    card = card_response.json()
+                else:
+                    card = {}
+                
+                health_status = "healthy" if health_response.status_code == 200 else "unhealthy"
+                
+                return AgentInfo(
+                    name=card.get("name", agent_name),
+                    url=base_url,
+                    status=health_status,
+                    capabilities=card.get("capabilities", [])
+                )
             except Exception as e:
-                discovered[agent_name] = AgentInfo(
+                self.agent_health[agent_name] = {"status": "error", "error": str(e), "agent": agent_name}
+                return AgentInfo(
                     name=agent_name,
                     url=base_url,
                     status="error",
                     capabilities=[]
                 )
         
+        # Probe all agents in parallel - total latency is the slowest agent, not the sum
+        names = list(self.agents)
+        results = await asyncio.gather(*(_probe(name, self.agents[name]) for name in names))
+        discovered = dict(zip(names, results))
+        
         self.agent_info = discovered
+        self._discovery_ts = time.monotonic()
         return discovered
+    
+    async def _discovery_refresher(self):
+        """Re-run agent discovery every DISCOVERY_TTL seconds so cached reads stay fresh"""
+        while True:
+            try:
+                await self.discover_agents(force=True)
+            except Exception as e:
+                logger.exception("❌ Agent discovery refresh failed: %s", e)
+            await asyncio.sleep(self._discovery_ttl)
 
 
 # Initialize the orchestrator service
@@ -447,10 +1044,43 @@ async def root():
     """Redirect to the UI"""
     return RedirectResponse(url="/static/index.html")
 
+# Static discovery payloads - serialized once at import instead of on every request
+_HEALTH_BYTES = orjson.dumps({
+    "agent": "OrchestratorAgent",
+    "status": "healthy",
+    "version": "1.0.0",
+    "role": "coordinator",
+    "semantic_kernel": SK_AVAILABLE,
+    "plugins": PLUGINS_AVAILABLE
+})
+
+_AGENT_CARD_BYTES = orjson.dumps({
+    "name": "OrchestratorAgent",
+    "description": "AI-powered portfolio management orchestrator with Semantic Kernel",
+    "version": "1.0.0",
+    "capabilities": [
+        "agent_coordination",
+        "ui_hosting", 
+        "chat_interface",
+        "semantic_kernel_ai",
+        "portfolio_analysis",
+        "stock_pricing",
+        "market_sentiment"
+    ],
+    "endpoints": {
+        "health": "/health",
+        "chat": "/chat/message",
+        "chat_stream": "/chat/stream",
+        "ui": "/static/index.html",
+        "agents": "/agents",
+        "discover": "/discover"
+    }
+})
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"agent": "OrchestratorAgent", "status": "healthy", "version": "1.0.0", "role": "coordinator"}
+    return Response(content=_HEALTH_BYTES, media_type="application/json")
 
 @app.get("/debug/sk")
 async def debug_semantic_kernel():
@@ -459,7 +1089,8 @@ async def debug_semantic_kernel():
         "semantic_kernel_available": SK_AVAILABLE,
         "plugins_available": PLUGINS_AVAILABLE,
         "kernel_initialized": orchestrator_service.kernel is not None,
-        "plugins_loaded": len(orchestrator_service.kernel.plugins) if orchestrator_service.kernel else 0
+        "plugins_loaded": len(orchestrator_service.kernel.plugins) if orchestrator_service.kernel else 0,
+        "fast_path_hits": orchestrator_service.fast_path_hits
     }
 
 @app.get("/ui")
@@ -475,27 +1106,7 @@ async def chat_interface():
 @app.get("/.well-known/agent-card")
 async def agent_card():
     """Agent discovery card"""
-    return {
-        "name": "OrchestratorAgent",
-        "description": "AI-powered portfolio management orchestrator with Semantic Kernel",
-        "version": "1.0.0",
-        "capabilities": [
-            "agent_coordination",
-            "ui_hosting", 
-            "chat_interface",
-            "semantic_kernel_ai",
-            "portfolio_analysis",
-            "stock_pricing",
-            "market_sentiment"
-        ],
-        "endpoints": {
-            "health": "/health",
-            "chat": "/chat/message",
-            "ui": "/static/index.html",
-            "agents": "/agents",
-            "discover": "/discover"
-        }
-    }
+    return Response(content=_AGENT_CARD_BYTES, media_type="application/json")
 
 @app.get("/price/{symbol}")
 async def get_price(symbol: str):
@@ -503,17 +1114,30 @@ async def get_price(symbol: str):
     return await orchestrator_service.get_stock_price_direct(symbol)
 
 @app.get("/stream/prices")
-async def stream_prices(symbols: str = "AAPL,MSFT,LLOY.L,SHEL,TSLA"):
+async def stream_prices(symbols: str = DEFAULT_STREAM_SYMBOLS):
     """Stream real-time price updates"""
     symbol_list = [s.strip() for s in symbols.split(",")]
     generator = await orchestrator_service.get_streaming_prices(symbol_list)
-    return StreamingResponse(generator, media_type="text/event-stream")
+    return StreamingResponse(
+        generator,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.post("/chat/message")
 async def chat_message(chat: ChatMessage):
     """Process chat messages with AI"""
     return await orchestrator_service.route_chat_message(chat.message, chat.session_id)
 
+@app.post("/chat/stream")
+async def chat_stream(chat: ChatMessage):
+    """Stream AI chat responses token by token via Server-Sent Events"""
+    return StreamingResponse(
+        orchestrator_service.stream_chat_message(chat.message, chat.session_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/rebalance/plan") 
 async def create_rebalance_plan():
     """Create portfolio rebalancing plan"""
@@ -522,33 +1146,35 @@ async def create_rebalance_plan():
 @app.get("/agents")
 async def list_agents():
     """List all available agents and their status"""
+    # Health comes from the cached discovery pass instead of N live health checks per request
+    await orchestrator_service.discover_agents()
     agents_info = {}
     for name, url in orchestrator_service.agents.items():
-        health = await orchestrator_service.get_agent_health(name)
         agents_info[name] = {
             "url": url,
-            "health": health
+            "health": orchestrator_service.agent_health.get(name, {"status": "unknown", "agent": name})
         }
     return agents_info
 
 @app.get("/discover")
 async def discover_agents():
-    """Discover agent capabilities"""
-    return await orchestrator_service.discover_agents()
-
-@app.get("/health")
-async def health():
-    """Health check"""
-    return {
-        "status": "healthy",
-        "service": "orchestrator",
-        "semantic_kernel": SK_AVAILABLE,
-        "plugins": PLUGINS_AVAILABLE
-    }
+    """Discover agent capabilities (always re-probes the agents)"""
+    return await orchestrator_service.discover_agents(force=True)
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("ORCHESTRATOR_PORT", "8010"))
     print(f"🚀 Starting OrchestratorAgent on port {port}")
     print(f"📊 UI available at: http://localhost:{port}/static/index.html")
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    # One worker by default: chat histories live in process memory, so a session whose turns
+    # landed on different workers would lose its context. Raise WEB_CONCURRENCY only behind a
+    # load balancer that pins sessions to a worker
+    uvicorn.run(
+        "agents.orchestrator.main:app",
+        app_dir=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        loop="uvloop",
+        http="httptools"
+    )
\ No newline at end of file
@@ -2,17 +2,138 @@
 Semantic Kernel Plugins for Orchestrator Agent
 Provides AI-accessible functions for stock pricing and portfolio rebalancing
 """
+import asyncio
 import httpx
-import json
+import orjson
+import time
+from types import MappingProxyType
 from typing import Dict, Optional
+from cachetools import LRUCache, TTLCache
 from semantic_kernel.functions import kernel_function
 
+# Request bodies are pre-serialized with orjson, so the content type is set explicitly
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Rebalance AI plans: served fresh for a minute, then stale while a background refresh runs,
+# and dropped entirely once too old to show
+PLAN_CACHE_FRESH_SECONDS = 60
+PLAN_CACHE_MAX_AGE_SECONDS = 600
+
+# Market concept explanations - a placeholder; in production, you might connect to a knowledge base
+_MARKET_CONTEXT = {
+    "diversification": "📚 **Diversification** is the practice of spreading investments across different assets to reduce risk. The idea is that different assets perform differently under various market conditions.",
+    "rebalancing": "📚 **Rebalancing** is adjusting your portfolio back to target allocations. As some investments grow faster than others, your portfolio can drift from its intended allocation.",
+    "turnover": "📚 **Portfolio Turnover** measures how much of a portfolio's holdings change over a period. High turnover can mean higher transaction costs and taxes.",
+    "allocation": "📚 **Asset Allocation** is how you divide investments among different asset categories like stocks, bonds, and cash. It's a key factor in portfolio performance.",
+}
+
+# Simulated sentiment data - in production, this would connect to news APIs
+_SENTIMENT_DATA = {
+    "AAPL": {
+        "sentiment_score": 0.75,  # -1 to 1 scale
+        "news_summary": "Strong Q4 earnings beat expectations, iPhone 16 sales robust, AI chip partnerships expanding",
+        "recent_events": ["Q4 earnings beat", "New AI partnerships", "Strong iPhone sales"],
+        "market_buzz": "Bullish",
+        "confidence": 0.85
+    },
+    "MSFT": {
+        "sentiment_score": 0.68,
+        "news_summary": "Azure growth continues, AI integration driving enterprise adoption, cloud market share gains",
+        "recent_events": ["Azure growth acceleration", "AI Copilot adoption", "Enterprise deals"],
+        "market_buzz": "Positive",
+        "confidence": 0.82
+    },
+    "TSLA": {
+        "sentiment_score": 0.45,
+        "news_summary": "Mixed signals on FSD progress, energy business growth, production scaling challenges",
+        "recent_events": ["FSD beta updates", "Energy storage growth", "Production targets"],
+        "market_buzz": "Cautiously Optimistic",
+        "confidence": 0.65
+    },
+    "SHEL": {
+        "sentiment_score": 0.32,
+        "news_summary": "Oil price volatility concerns, renewable transition investments, geopolitical tensions",
+        "recent_events": ["Oil price fluctuations", "Renewable investments", "Geopolitical risks"],
+        "market_buzz": "Mixed",
+        "confidence": 0.70
+    },
+    "LLOY.L": {
+        "sentiment_score": 0.28,
+        "news_summary": "UK economic uncertainty, interest rate impacts, banking sector challenges",
+        "recent_events": ["UK economic data", "Interest rate changes", "Banking regulations"],
+        "market_buzz": "Cautious",
+        "confidence": 0.75
+    }
+}
+
+# Symbol -> (currency sign, approximate FX rate to USD); anything not listed trades in USD
+_CCY = {"LLOY.L": ("£", 1.27)}
+_DEFAULT_CCY = ("$", 1.0)
+
+# In-memory transaction data - realistic trading history
+_TRANSACTION_DATA = {
+    "AAPL": [
+        {"date": "2024-01-15", "action": "BUY", "shares": 50, "price": 185.50, "total": 9275.00},
+        {"date": "2024-03-20", "action": "BUY", "shares": 100, "price": 225.30, "total": 22530.00},
+    ],
+    "MSFT": [
+        {"date": "2024-02-10", "action": "BUY", "shares": 75, "price": 405.50, "total": 30412.50},
+        {"date": "2024-04-05", "action": "BUY", "shares": 125, "price": 435.80, "total": 54475.00},
+    ],
+    "LLOY.L": [
+        {"date": "2024-01-08", "action": "BUY", "shares": 2500, "price": 0.8420, "total": 2105.00},
+        {"date": "2024-02-28", "action": "BUY", "shares": 2500, "price": 0.8908, "total": 2227.00},
+    ],
+    "SHEL": [
+        {"date": "2024-03-15", "action": "BUY", "shares": 400, "price": 68.75, "total": 27500.00},
+        {"date": "2024-05-12", "action": "BUY", "shares": 400, "price": 74.42, "total": 29768.00},
+    ],
+    "TSLA": [
+        {"date": "2024-04-22", "action": "BUY", "shares": 80, "price": 162.50, "total": 13000.00},
+    ]
+}
+
 
 class StockPricingPlugin:
     """Plugin for real-time stock pricing operations"""
     
     def __init__(self, pricing_agent_url: str):
         self.pricing_agent_url = pricing_agent_url
+        # One pooled client per plugin - keep-alive connections are reused across tool calls,
+        # and concurrent requests multiplex over one HTTP/2 connection where the agent supports it
+        self._client = httpx.AsyncClient(
+            base_url=pricing_agent_url,
+            http2=True,
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30)
+        )
+        # Cap concurrent lookups so a long symbol list can't swamp the pricing agent
+        self._fetch_slots = asyncio.Semaphore(20)
+        # Tool-calling loops often ask for the same symbol several times in one conversation
+        self._price_cache = TTLCache(maxsize=256, ttl=5.0)
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        await self._client.aclose()
+    
+    async def warmup(self):
+        """Open a pooled connection to the pricing agent so the first tool call skips connect/DNS"""
+        try:
+            await self._client.get("/health", timeout=2.0)
+        except Exception:
+            pass  # Agent not up yet - the first real call connects instead
+    
+    async def _get_price_data(self, symbol: str) -> Optional[dict]:
+        """Fetch a symbol's price payload, served from the short-lived cache when fresh"""
+        data = self._price_cache.get(symbol)
+        if data is None:
+            async with self._fetch_slots:
+                response = await self._client.get(f"/price/{symbol}")
+            if response.status_code != 200:
+                return None
+            data = orjson.loads(response.content)
+            self._price_cache[symbol] = data
+        return data
     
     @kernel_function(
         name="get_stock_price",
@@ -29,20 +150,18 @@ class StockPricingPlugin:
             A formatted string with the current price and currency
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.pricing_agent_url}/price/{symbol.upper()}")
+            data = await self._get_price_data(symbol.upper())
+            
+            if data is not None:
+                currency = data.get('currency', '$')
+                price = data['price']
+                stock_symbol = data['symbol']
+                source = data.get('source', 'Yahoo Finance')
+                
+                return f"📈 **{stock_symbol}** is currently trading at **{currency}{price:.2f}** (Source: {source})"
+            else:
+                return f"❌ Unable to get price for {symbol}. The symbol may be invalid or the service is unavailable."
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    currency = data.get('currency', '$')
-                    price = data['price']
-                    stock_symbol = data['symbol']
-                    source = data.get('source', 'Yahoo Finance')
-                    
-                    return f"📈 **{stock_symbol}** is currently trading at **{currency}{price:.2f}** (Source: {source})"
-                else:
-                    return f"❌ Unable to get price for {symbol}. The symbol may be invalid or the service is unavailable."
-                    
         except Exception as e:
             return f"❌ Error retrieving price for {symbol}: {str(e)}"
     
@@ -61,21 +180,30 @@ class StockPricingPlugin:
             A formatted string with all prices
         """
         try:
-            symbol_list = [s.strip().upper() for s in symbols.split(',')]
-            results = []
+            # Order-preserving de-dup: "AAPL,AAPL,MSFT" costs one lookup per unique ticker
+            symbol_list = list(dict.fromkeys(s.strip().upper() for s in symbols.split(',') if s.strip()))
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                for symbol in symbol_list:
+            # Fetch all symbols concurrently (cached ones cost no HTTP) - total latency is the
+            # slowest lookup, not the sum
+            payloads = await asyncio.gather(
+                *(self._get_price_data(symbol) for symbol in symbol_list), return_exceptions=True
+            )
+            
+            results = []
+            for symbol, data in zip(symbol_list, payloads):
+                # Failed lookups come back as values - check them instead of re-raising per symbol
+                if isinstance(data, (httpx.HTTPError, ValueError)):
+                    results.append(f"**{symbol}**: ❌ Error")
+                elif isinstance(data, BaseException):
+                    raise data
+                elif data is None:
+                    results.append(f"**{symbol}**: ❌ Not available")
+                else:
                     try:
-                        response = await client.get(f"{self.pricing_agent_url}/price/{symbol}")
-                        if response.status_code == 200:
-                            data = response.json()
-                            currency = data.get('currency', '$')
-                            price = data['price']
-                            results.append(f"**{data['symbol']}**: {currency}{price:.2f}")
-                        else:
-                            results.append(f"**{symbol}**: ❌ Not available")
-                    except:
+                        currency = data.get('currency', '$')
+                        price = data['price']
+                        results.append(f"**{data['symbol']}**: {currency}{price:.2f}")
+                    except (KeyError, TypeError, ValueError):
                         results.append(f"**{symbol}**: ❌ Error")
             
             if results:
@@ -92,6 +220,67 @@ class PortfolioRebalancingPlugin:
     
     def __init__(self, rebalance_agent_url: str):
         self.rebalance_agent_url = rebalance_agent_url
+        # One pooled client per plugin - keep-alive connections are reused across tool calls,
+        # and concurrent requests multiplex over one HTTP/2 connection where the agent supports it
+        self._client = httpx.AsyncClient(
+            base_url=rebalance_agent_url,
+            http2=True,
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=40, max_connections=100, keepalive_expiry=30)
+        )
+        # Canonical request body -> (fetched_at, result); the upstream call runs an LLM, and the
+        # model often re-invokes these tools with the same portfolio within one chat
+        self._plan_cache = LRUCache(maxsize=128)
+        self._refreshing: Dict[bytes, asyncio.Task] = {}
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await self._client.aclose()
+    
+    async def warmup(self):
+        """Open a pooled connection to the rebalance agent so the first tool call skips connect/DNS"""
+        try:
+            await self._client.get("/health", timeout=2.0)
+        except Exception:
+            pass  # Agent not up yet - the first real call connects instead
+    
+    async def _request_plan(self, request_data: dict):
+        """POST a plan request through the stale-while-revalidate cache; returns (status_code, result)"""
+        # Sorted keys make the body a stable cache key, and it doubles as the request content
+        body = orjson.dumps(request_data, option=orjson.OPT_SORT_KEYS)
+        
+        cached = self._plan_cache.get(body)
+        if cached is not None:
+            fetched_at, result = cached
+            age = time.monotonic() - fetched_at
+            if age < PLAN_CACHE_MAX_AGE_SECONDS:
+                if age >= PLAN_CACHE_FRESH_SECONDS and body not in self._refreshing:
+                    self._refreshing[body] = asyncio.create_task(self._refresh_plan(body))
+                return 200, result
+        
+        return await self._fetch_plan(body)
+    
+    async def _fetch_plan(self, body: bytes):
+        """Call the AI rebalancing endpoint and cache successful AI analyses"""
+        response = await self._client.post("/rebalance/plan/ai", content=body, headers=_JSON_HEADERS)
+        if response.status_code != 200:
+            return response.status_code, None
+        
+        result = orjson.loads(response.content)
+        if result.get('success') and result.get('ai_analysis'):  # Never pin a fallback answer
+            self._plan_cache[body] = (time.monotonic(), result)
+        return 200, result
+    
+    async def _refresh_plan(self, body: bytes):
+        """Background revalidation - on failure the stale entry keeps serving until it ages out"""
+        try:
+            await self._fetch_plan(body)
+        except Exception:
+            pass
+        finally:
+            self._refreshing.pop(body, None)
     
     @kernel_function(
         name="create_rebalancing_plan",
@@ -126,9 +315,8 @@ class PortfolioRebalancingPlugin:
         """
         try:
             # Parse inputs
-            import json
-            positions = json.loads(portfolio_json)
-            targets = json.loads(targets_json)
+            positions = orjson.loads(portfolio_json)
+            targets = orjson.loads(targets_json)
             
             # Build request
             request_data = {
@@ -143,44 +331,41 @@ class PortfolioRebalancingPlugin:
                 }
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Use the AI-powered endpoint for clean HTML output
-                response = await client.post(
-                    f"{self.rebalance_agent_url}/rebalance/plan/ai",
-                    json=request_data
-                )
+            # Use the AI-powered endpoint for clean HTML output
+            status_code, result = await self._request_plan(request_data)
+            
+            if status_code == 200:
                 
-                if response.status_code == 200:
-                    result = response.json()
+                # Return the AI-generated HTML analysis
+                if result.get('success') and result.get('ai_analysis'):
+                    return result['ai_analysis']
+                else:
+                    # Fallback to traditional format if AI fails
+                    plan = result.get('traditional_plan', {})
+                    parts = [
+                        "⚖️ **Portfolio Rebalancing Plan**\n\n",
+                        f"💼 **Current Portfolio Value**: ${plan.get('currentValue', 0):,.2f}\n\n",
+                    ]
                     
-                    # Return the AI-generated HTML analysis
-                    if result.get('success') and result.get('ai_analysis'):
-                        return result['ai_analysis']
+                    if plan.get('trades'):
+                        parts.append("📋 **Recommended Trades:**\n")
+                        parts.extend(
+                            f"{i}. {'🟢' if trade['side'] == 'BUY' else '🔴'} **{trade['side']}** {trade['quantity']} shares of **{trade['symbol']}** @ ~${trade['estPrice']:.2f}\n"
+                            f"   _{trade['reason']}_\n"
+                            for i, trade in enumerate(plan['trades'], 1)
+                        )
                     else:
-                        # Fallback to traditional format if AI fails
-                        plan = result.get('traditional_plan', {})
-                        output = f"⚖️ **Portfolio Rebalancing Plan**\n\n"
-                        output += f"💼 **Current Portfolio Value**: ${plan.get('currentValue', 0):,.2f}\n\n"
-                        
-                        if plan.get('trades'):
-                            output += "📋 **Recommended Trades:**\n"
-                            for i, trade in enumerate(plan['trades'], 1):
-                                side_emoji = "🟢" if trade['side'] == 'BUY' else "🔴"
-                                output += f"{i}. {side_emoji} **{trade['side']}** {trade['quantity']} shares of **{trade['symbol']}** @ ~${trade['estPrice']:.2f}\n"
-                                output += f"   _{trade['reason']}_\n"
-                        else:
-                            output += "✅ **No trades needed** - Portfolio is already well-balanced!\n"
-                        
-                        if plan.get('notes'):
-                            output += f"\n📝 **Notes:**\n"
-                            for note in plan['notes']:
-                                output += f"• {note}\n"
-                        
-                        return output
-                else:
-                    return f"❌ Rebalancing service returned an error: {response.status_code}"
+                        parts.append("✅ **No trades needed** - Portfolio is already well-balanced!\n")
                     
-        except json.JSONDecodeError as e:
+                    if plan.get('notes'):
+                        parts.append("\n📝 **Notes:**\n")
+                        parts.extend(f"• {note}\n" for note in plan['notes'])
+                    
+                    return "".join(parts)
+            else:
+                return f"❌ Rebalancing service returned an error: {status_code}"
+                
+        except orjson.JSONDecodeError as e:
             return f"❌ Invalid JSON format: {str(e)}. Please provide valid JSON for portfolio and targets."
         except Exception as e:
             return f"❌ Error creating rebalancing plan: {str(e)}"
@@ -201,38 +386,36 @@ class PortfolioRebalancingPlugin:
             Current portfolio value and breakdown
         """
         try:
-            import json
-            positions = json.loads(portfolio_json)
+            positions = orjson.loads(portfolio_json)
+            if not positions:
+                return "❌ No positions provided. Please list your holdings, e.g. \"10 AMZN, 5 AAPL\"."
             
+            # Equal weight dummy targets - the weight only needs computing once
+            weight = 1.0 / len(positions)
             request_data = {
                 "portfolio": {
                     "baseCurrency": "USD",
                     "positions": positions
                 },
-                "targets": {pos['symbol']: 1.0/len(positions) for pos in positions},  # Equal weight dummy
+                "targets": dict.fromkeys((pos['symbol'] for pos in positions), weight),
                 "constraints": {"maxTurnover": 0.0, "minTradeValue": 999999.0}  # No trades
             }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Use the AI-powered endpoint for better analysis
-                response = await client.post(
-                    f"{self.rebalance_agent_url}/rebalance/plan/ai",
-                    json=request_data
-                )
+            # Use the AI-powered endpoint for better analysis
+            status_code, result = await self._request_plan(request_data)
+            
+            if status_code == 200:
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    
-                    # Return the AI-generated HTML analysis  
-                    if result.get('success') and result.get('ai_analysis'):
-                        return result['ai_analysis']
-                    else:
-                        # Fallback to simple value
-                        plan = result.get('traditional_plan', {})
-                        return f"💼 **Total Portfolio Value**: ${plan.get('currentValue', 0):,.2f}"
+                # Return the AI-generated HTML analysis  
+                if result.get('success') and result.get('ai_analysis'):
+                    return result['ai_analysis']
                 else:
-                    return f"❌ Unable to calculate portfolio value"
-                    
+                    # Fallback to simple value
+                    plan = result.get('traditional_plan', {})
+                    return f"💼 **Total Portfolio Value**: ${plan.get('currentValue', 0):,.2f}"
+            else:
+                return f"❌ Unable to calculate portfolio value"
+                
         except Exception as e:
             return f"❌ Error analyzing portfolio: {str(e)}"
 
@@ -254,16 +437,13 @@ class MarketInsightsPlugin:
         Returns:
             Educational information about the topic
         """
-        # This is a placeholder - in production, you might connect to a knowledge base
-        context_map = {
-            "diversification": "📚 **Diversification** is the practice of spreading investments across different assets to reduce risk. The idea is that different assets perform differently under various market conditions.",
-            "rebalancing": "📚 **Rebalancing** is adjusting your portfolio back to target allocations. As some investments grow faster than others, your portfolio can drift from its intended allocation.",
-            "turnover": "📚 **Portfolio Turnover** measures how much of a portfolio's holdings change over a period. High turnover can mean higher transaction costs and taxes.",
-            "allocation": "📚 **Asset Allocation** is how you divide investments among different asset categories like stocks, bonds, and cash. It's a key factor in portfolio performance.",
-        }
+        topic_lower = topic.strip().lower()
         
-        topic_lower = topic.lower()
-        for key, value in context_map.items():
+        # Exact topic ("rebalancing") is a single dict lookup; only phrases fall back to the scan
+        value = _MARKET_CONTEXT.get(topic_lower)
+        if value is not None:
+            return value
+        for key, value in _MARKET_CONTEXT.items():
             if key in topic_lower:
                 return value
         
@@ -274,44 +454,110 @@ class MarketSentimentPlugin:
     """Plugin for AI-powered market sentiment analysis and news intelligence"""
     
     def __init__(self):
-        # Simulated sentiment data - in production, this would connect to news APIs
-        self.sentiment_data = {
-            "AAPL": {
-                "sentiment_score": 0.75,  # -1 to 1 scale
-                "news_summary": "Strong Q4 earnings beat expectations, iPhone 16 sales robust, AI chip partnerships expanding",
-                "recent_events": ["Q4 earnings beat", "New AI partnerships", "Strong iPhone sales"],
-                "market_buzz": "Bullish",
-                "confidence": 0.85
-            },
-            "MSFT": {
-                "sentiment_score": 0.68,
-                "news_summary": "Azure growth continues, AI integration driving enterprise adoption, cloud market share gains",
-                "recent_events": ["Azure growth acceleration", "AI Copilot adoption", "Enterprise deals"],
-                "market_buzz": "Positive",
-                "confidence": 0.82
-            },
-            "TSLA": {
-                "sentiment_score": 0.45,
-                "news_summary": "Mixed signals on FSD progress, energy business growth, production scaling challenges",
-                "recent_events": ["FSD beta updates", "Energy storage growth", "Production targets"],
-                "market_buzz": "Cautiously Optimistic",
-                "confidence": 0.65
-            },
-            "SHEL": {
-                "sentiment_score": 0.32,
-                "news_summary": "Oil price volatility concerns, renewable transition investments, geopolitical tensions",
-                "recent_events": ["Oil price fluctuations", "Renewable investments", "Geopolitical risks"],
-                "market_buzz": "Mixed",
-                "confidence": 0.70
-            },
-            "LLOY.L": {
-                "sentiment_score": 0.28,
-                "news_summary": "UK economic uncertainty, interest rate impacts, banking sector challenges",
-                "recent_events": ["UK economic data", "Interest rate changes", "Banking regulations"],
-                "market_buzz": "Cautious",
-                "confidence": 0.75
-            }
+        # Shared read-only view - instances don't copy the dataset
+        self.sentiment_data = MappingProxyType(_SENTIMENT_DATA)
+        
+        # The data is read-only, so every report is rendered once here and tool calls are lookups
+        self._sentiment_reports = {
+            symbol: self._render_sentiment(symbol, data) for symbol, data in self.sentiment_data.items()
         }
+        self._portfolio_overview = self._render_portfolio_overview()
+        self._available_symbols = ", ".join(self.sentiment_data)
+    
+    def _render_sentiment(self, symbol: str, data: dict) -> str:
+        """Format the sentiment report for one symbol (sentiment data is static, so this runs once)"""
+        sentiment_score = data["sentiment_score"]
+        
+        # Determine sentiment emoji and description
+        if sentiment_score >= 0.6:
+            sentiment_emoji = "🟢"
+            sentiment_desc = "Bullish"
+            color = "positive"
+        elif sentiment_score >= 0.3:
+            sentiment_emoji = "🟡"
+            sentiment_desc = "Neutral"
+            color = "cautious"
+        else:
+            sentiment_emoji = "🔴"
+            sentiment_desc = "Bearish"
+            color = "negative"
+        
+        # Format confidence level
+        confidence_stars = "⭐" * int(data["confidence"] * 5)
+        
+        parts = [
+            f"📰 **Market Sentiment Analysis for {symbol}**\n\n",
+            f"**Sentiment Score**: {sentiment_emoji} {sentiment_score:.2f}/1.00 ({sentiment_desc})\n",
+            f"**Market Buzz**: {data['market_buzz']}\n",
+            f"**Confidence**: {confidence_stars} ({data['confidence']:.1%})\n\n",
+            f"📊 **News Summary**:\n{data['news_summary']}\n\n",
+            "📈 **Recent Market Events**:\n",
+        ]
+        parts.extend(f"• {event}\n" for event in data["recent_events"])
+        
+        # Add AI-powered investment insight
+        parts.append("\n🤖 **AI Investment Insight**:\n")
+        if sentiment_score >= 0.6:
+            parts.append(f"Strong positive sentiment suggests potential upward momentum. Consider this favorable environment for your {symbol} position.")
+        elif sentiment_score >= 0.3:
+            parts.append(f"Mixed sentiment indicates market uncertainty. Monitor closely and consider your risk tolerance for {symbol}.")
+        else:
+            parts.append(f"Negative sentiment suggests caution. Review your {symbol} position and consider defensive strategies.")
+        
+        return "".join(parts)
+    
+    def _render_portfolio_overview(self) -> str:
+        """Format the portfolio-wide sentiment overview (sentiment data is static, so this runs once)"""
+        total_sentiment = 0
+        sentiment_details = []
+        
+        for symbol, data in self.sentiment_data.items():
+            sentiment_score = data["sentiment_score"]
+            total_sentiment += sentiment_score
+            
+            if sentiment_score >= 0.6:
+                emoji = "🟢"
+            elif sentiment_score >= 0.3:
+                emoji = "🟡"
+            else:
+                emoji = "🔴"
+            
+            sentiment_details.append(f"{emoji} **{symbol}**: {sentiment_score:.2f} ({data['market_buzz']})")
+        
+        # Calculate average sentiment
+        avg_sentiment = total_sentiment / len(self.sentiment_data)
+        
+        # Overall portfolio sentiment
+        if avg_sentiment >= 0.6:
+            overall_emoji = "🟢"
+            overall_desc = "Bullish"
+            risk_level = "Low"
+        elif avg_sentiment >= 0.4:
+            overall_emoji = "🟡"
+            overall_desc = "Neutral"
+            risk_level = "Moderate"
+        else:
+            overall_emoji = "🔴"
+            overall_desc = "Cautious"
+            risk_level = "Elevated"
+        
+        parts = [
+            "📊 **Portfolio Sentiment Overview**\n\n",
+            f"**Overall Portfolio Sentiment**: {overall_emoji} {avg_sentiment:.2f}/1.00 ({overall_desc})\n",
+            f"**Risk Level**: {risk_level}\n\n",
+            "**Individual Holdings Sentiment**:\n",
+        ]
+        parts.extend(f"{detail}\n" for detail in sentiment_details)
+        
+        parts.append("\n🎯 **Portfolio Strategy Recommendation**:\n")
+        if avg_sentiment >= 0.5:
+            parts.append("Positive sentiment across holdings suggests growth opportunities. Consider maintaining current allocations.")
+        elif avg_sentiment >= 0.3:
+            parts.append("Mixed sentiment suggests selective approach. Focus on highest conviction positions.")
+        else:
+            parts.append("Cautious sentiment suggests defensive positioning. Consider reducing risk exposure.")
+        
+        return "".join(parts)
     
     @kernel_function(
         name="analyze_market_sentiment",
@@ -327,55 +573,12 @@ class MarketSentimentPlugin:
         Returns:
             Comprehensive sentiment analysis with actionable insights
         """
-        try:
-            symbol = symbol.upper()
-            if symbol not in self.sentiment_data:
-                return f"❌ Sentiment analysis not available for {symbol}. Available: {', '.join(self.sentiment_data.keys())}"
-            
-            data = self.sentiment_data[symbol]
-            sentiment_score = data["sentiment_score"]
-            
-            # Determine sentiment emoji and description
-            if sentiment_score >= 0.6:
-                sentiment_emoji = "🟢"
-                sentiment_desc = "Bullish"
-                color = "positive"
-            elif sentiment_score >= 0.3:
-                sentiment_emoji = "🟡"
-                sentiment_desc = "Neutral"
-                color = "cautious"
-            else:
-                sentiment_emoji = "🔴"
-                sentiment_desc = "Bearish"
-                color = "negative"
-            
-            # Format confidence level
-            confidence_stars = "⭐" * int(data["confidence"] * 5)
-            
-            result = f"📰 **Market Sentiment Analysis for {symbol}**\n\n"
-            result += f"**Sentiment Score**: {sentiment_emoji} {sentiment_score:.2f}/1.00 ({sentiment_desc})\n"
-            result += f"**Market Buzz**: {data['market_buzz']}\n"
-            result += f"**Confidence**: {confidence_stars} ({data['confidence']:.1%})\n\n"
-            
-            result += f"📊 **News Summary**:\n{data['news_summary']}\n\n"
-            
-            result += f"📈 **Recent Market Events**:\n"
-            for event in data["recent_events"]:
-                result += f"• {event}\n"
-            
-            # Add AI-powered investment insight
-            result += f"\n🤖 **AI Investment Insight**:\n"
-            if sentiment_score >= 0.6:
-                result += f"Strong positive sentiment suggests potential upward momentum. Consider this favorable environment for your {symbol} position."
-            elif sentiment_score >= 0.3:
-                result += f"Mixed sentiment indicates market uncertainty. Monitor closely and consider your risk tolerance for {symbol}."
-            else:
-                result += f"Negative sentiment suggests caution. Review your {symbol} position and consider defensive strategies."
-            
-            return result
-            
-        except Exception as e:
-            return f"❌ Error analyzing sentiment for {symbol}: {str(e)}"
+        symbol = symbol.upper()
+        report = self._sentiment_reports.get(symbol)
+        if report is None:
+            return f"❌ Sentiment analysis not available for {symbol}. Available: {self._available_symbols}"
+        
+        return report
     
     @kernel_function(
         name="get_portfolio_sentiment_overview",
@@ -388,61 +591,7 @@ class MarketSentimentPlugin:
         Returns:
             Portfolio-wide sentiment summary with risk assessment
         """
-        try:
-            result = "📊 **Portfolio Sentiment Overview**\n\n"
-            
-            total_sentiment = 0
-            sentiment_details = []
-            
-            for symbol, data in self.sentiment_data.items():
-                sentiment_score = data["sentiment_score"]
-                total_sentiment += sentiment_score
-                
-                if sentiment_score >= 0.6:
-                    emoji = "🟢"
-                elif sentiment_score >= 0.3:
-                    emoji = "🟡"
-                else:
-                    emoji = "🔴"
-                
-                sentiment_details.append(f"{emoji} **{symbol}**: {sentiment_score:.2f} ({data['market_buzz']})")
-            
-            # Calculate average sentiment
-            avg_sentiment = total_sentiment / len(self.sentiment_data)
-            
-            # Overall portfolio sentiment
-            if avg_sentiment >= 0.6:
-                overall_emoji = "🟢"
-                overall_desc = "Bullish"
-                risk_level = "Low"
-            elif avg_sentiment >= 0.4:
-                overall_emoji = "🟡"
-                overall_desc = "Neutral"
-                risk_level = "Moderate"
-            else:
-                overall_emoji = "🔴"
-                overall_desc = "Cautious"
-                risk_level = "Elevated"
-            
-            result += f"**Overall Portfolio Sentiment**: {overall_emoji} {avg_sentiment:.2f}/1.00 ({overall_desc})\n"
-            result += f"**Risk Level**: {risk_level}\n\n"
-            
-            result += "**Individual Holdings Sentiment**:\n"
-            for detail in sentiment_details:
-                result += f"{detail}\n"
-            
-            result += f"\n🎯 **Portfolio Strategy Recommendation**:\n"
-            if avg_sentiment >= 0.5:
-                result += "Positive sentiment across holdings suggests growth opportunities. Consider maintaining current allocations."
-            elif avg_sentiment >= 0.3:
-                result += "Mixed sentiment suggests selective approach. Focus on highest conviction positions."
-            else:
-                result += "Cautious sentiment suggests defensive positioning. Consider reducing risk exposure."
-            
-            return result
-            
-        except Exception as e:
-            return f"❌ Error analyzing portfolio sentiment: {str(e)}"
+        return self._portfolio_overview
     
     @kernel_function(
         name="get_market_news_impact",
@@ -460,7 +609,7 @@ class MarketSentimentPlugin:
         """
         try:
             if symbol.upper() == "ALL":
-                result = "📰 **Market News Impact Analysis - Full Portfolio**\n\n"
+                parts = ["📰 **Market News Impact Analysis - Full Portfolio**\n\n"]
                 
                 high_impact = []
                 medium_impact = []
@@ -476,25 +625,22 @@ class MarketSentimentPlugin:
                         low_impact.append(f"{stock_symbol}: {data['market_buzz']}")
                 
                 if high_impact:
-                    result += "🔥 **High Impact Holdings**:\n"
-                    for item in high_impact:
-                        result += f"• {item}\n"
-                    result += "\n"
+                    parts.append("🔥 **High Impact Holdings**:\n")
+                    parts.extend(f"• {item}\n" for item in high_impact)
+                    parts.append("\n")
                 
                 if medium_impact:
-                    result += "⚡ **Medium Impact Holdings**:\n"
-                    for item in medium_impact:
-                        result += f"• {item}\n"
-                    result += "\n"
+                    parts.append("⚡ **Medium Impact Holdings**:\n")
+                    parts.extend(f"• {item}\n" for item in medium_impact)
+                    parts.append("\n")
                 
                 if low_impact:
-                    result += "📊 **Stable Holdings**:\n"
-                    for item in low_impact:
-                        result += f"• {item}\n"
+                    parts.append("📊 **Stable Holdings**:\n")
+                    parts.extend(f"• {item}\n" for item in low_impact)
                 
-                result += "\n💡 **Action Items**: Monitor high-impact holdings closely for trading opportunities."
+                parts.append("\n💡 **Action Items**: Monitor high-impact holdings closely for trading opportunities.")
                 
-                return result
+                return "".join(parts)
             else:
                 return await self.analyze_market_sentiment(symbol)
                 
@@ -506,29 +652,69 @@ class TransactionHistoryPlugin:
     """Plugin for managing and analyzing transaction history with contextual intelligence"""
     
     def __init__(self):
-        # In-memory transaction data - realistic trading history
-        self.transaction_data = {
-            "AAPL": [
-                {"date": "2024-01-15", "action": "BUY", "shares": 50, "price": 185.50, "total": 9275.00},
-                {"date": "2024-03-20", "action": "BUY", "shares": 100, "price": 225.30, "total": 22530.00},
-            ],
-            "MSFT": [
-                {"date": "2024-02-10", "action": "BUY", "shares": 75, "price": 405.50, "total": 30412.50},
-                {"date": "2024-04-05", "action": "BUY", "shares": 125, "price": 435.80, "total": 54475.00},
-            ],
-            "LLOY.L": [
-                {"date": "2024-01-08", "action": "BUY", "shares": 2500, "price": 0.8420, "total": 2105.00},
-                {"date": "2024-02-28", "action": "BUY", "shares": 2500, "price": 0.8908, "total": 2227.00},
-            ],
-            "SHEL": [
-                {"date": "2024-03-15", "action": "BUY", "shares": 400, "price": 68.75, "total": 27500.00},
-                {"date": "2024-05-12", "action": "BUY", "shares": 400, "price": 74.42, "total": 29768.00},
-            ],
-            "TSLA": [
-                {"date": "2024-04-22", "action": "BUY", "shares": 80, "price": 162.50, "total": 13000.00},
-            ]
+        # Shared read-only view - instances don't copy the dataset
+        self.transaction_data = MappingProxyType(_TRANSACTION_DATA)
+        
+        # Transactions are read-only, so aggregates and history views are computed once here
+        self._positions = {
+            symbol: self._aggregate(symbol, transactions) for symbol, transactions in self.transaction_data.items()
+        }
+        self._history_reports = {symbol: self._render_history(symbol) for symbol in self.transaction_data}
+        self._all_history = self._render_all_history()
+        self._available_symbols = ", ".join(self.transaction_data)
+    
+    @staticmethod
+    def _aggregate(symbol: str, transactions: list) -> dict:
+        """Summarize a symbol's BUY transactions into shares, invested amount and average cost"""
+        # One pass over the transactions for both totals
+        total_shares = 0
+        total_invested = 0
+        for tx in transactions:
+            if tx['action'] == 'BUY':
+                total_shares += tx['shares']
+                total_invested += tx['total']
+        currency, fx_to_usd = _CCY.get(symbol, _DEFAULT_CCY)
+        return {
+            "total_shares": total_shares,
+            "total_invested": total_invested,
+            "avg_cost": total_invested / total_shares if total_shares > 0 else 0,
+            "currency": currency,
+            "fx_to_usd": fx_to_usd,
+            "transaction_count": len(transactions),
         }
     
+    def _render_history(self, symbol: str) -> str:
+        """Format the transaction history for one symbol"""
+        position = self._positions[symbol]
+        currency = position["currency"]
+        parts = [f"📊 **Transaction History for {symbol}**\n\n"]
+        parts.extend(
+            f"• **{tx['date']}**: {tx['action']} {tx['shares']} shares @ {currency}{tx['price']:.2f} = {currency}{tx['total']:,.2f}\n"
+            for tx in self.transaction_data[symbol]
+        )
+        parts.append(f"\n📈 **Summary**: {position['total_shares']} total shares, Average cost: {currency}{position['avg_cost']:.2f}, Total invested: {currency}{position['total_invested']:,.2f}")
+        return "".join(parts)
+    
+    def _render_all_history(self) -> str:
+        """Format the complete transaction history across all holdings"""
+        parts = ["📊 **Complete Transaction History**\n\n"]
+        total_invested = 0
+        
+        for stock_symbol, transactions in self.transaction_data.items():
+            position = self._positions[stock_symbol]
+            currency = position["currency"]
+            parts.append(f"**{stock_symbol}:**\n")
+            parts.extend(
+                f"• {tx['date']}: {tx['action']} {tx['shares']} shares @ {currency}{tx['price']:.2f} = {currency}{tx['total']:,.2f}\n"
+                for tx in transactions
+            )
+            parts.append(f"  *Total: {position['total_shares']} shares, Avg Cost: {currency}{position['avg_cost']:.2f}, Invested: {currency}{position['total_invested']:,.2f}*\n\n")
+            
+            total_invested += position['total_invested'] * position['fx_to_usd']  # Convert to USD for total
+        
+        parts.append(f"💰 **Portfolio Total Invested: ${total_invested:,.2f}**")
+        return "".join(parts)
+    
     @kernel_function(
         name="get_transaction_history",
         description="Get complete transaction history for a stock symbol or all holdings. Use this when users ask about their purchase history, when they bought stocks, or trading patterns."
@@ -543,60 +729,14 @@ class TransactionHistoryPlugin:
         Returns:
             Formatted transaction history with analysis
         """
-        try:
-            if symbol.upper() == "ALL":
-                result = "📊 **Complete Transaction History**\n\n"
-                total_invested = 0
-                
-                for stock_symbol, transactions in self.transaction_data.items():
-                    result += f"**{stock_symbol}:**\n"
-                    stock_total = 0
-                    total_shares = 0
-                    
-                    for tx in transactions:
-                        currency = "£" if stock_symbol == "LLOY.L" else "$"
-                        result += f"• {tx['date']}: {tx['action']} {tx['shares']} shares @ {currency}{tx['price']:.2f} = {currency}{tx['total']:,.2f}\n"
-                        stock_total += tx['total']
-                        if tx['action'] == 'BUY':
-                            total_shares += tx['shares']
-                    
-                    avg_cost = stock_total / total_shares if total_shares > 0 else 0
-                    currency = "£" if stock_symbol == "LLOY.L" else "$"
-                    result += f"  *Total: {total_shares} shares, Avg Cost: {currency}{avg_cost:.2f}, Invested: {currency}{stock_total:,.2f}*\n\n"
-                    
-                    if stock_symbol != "LLOY.L":  # Convert to USD for total
-                        total_invested += stock_total
-                    else:  # Convert GBP to USD (approximate)
-                        total_invested += stock_total * 1.27
-                
-                result += f"💰 **Portfolio Total Invested: ${total_invested:,.2f}**"
-                return result
-                
-            else:
-                symbol = symbol.upper()
-                if symbol not in self.transaction_data:
-                    return f"❌ No transaction history found for {symbol}. Available symbols: {', '.join(self.transaction_data.keys())}"
-                
-                transactions = self.transaction_data[symbol]
-                result = f"📊 **Transaction History for {symbol}**\n\n"
-                
-                total_shares = 0
-                total_invested = 0
-                currency = "£" if symbol == "LLOY.L" else "$"
-                
-                for tx in transactions:
-                    result += f"• **{tx['date']}**: {tx['action']} {tx['shares']} shares @ {currency}{tx['price']:.2f} = {currency}{tx['total']:,.2f}\n"
-                    total_invested += tx['total']
-                    if tx['action'] == 'BUY':
-                        total_shares += tx['shares']
-                
-                avg_cost = total_invested / total_shares if total_shares > 0 else 0
-                result += f"\n📈 **Summary**: {total_shares} total shares, Average cost: {currency}{avg_cost:.2f}, Total invested: {currency}{total_invested:,.2f}"
-                
-                return result
-                
-        except Exception as e:
-            return f"❌ Error retrieving transaction history: {str(e)}"
+        symbol = symbol.upper()
+        if symbol == "ALL":
+            return self._all_history
+        
+        report = self._history_reports.get(symbol)
+        if report is None:
+            return f"❌ No transaction history found for {symbol}. Available symbols: {self._available_symbols}"
+        return report
     
     @kernel_function(
         name="analyze_position_performance",
@@ -615,15 +755,14 @@ Returns:
         """
         try:
             symbol = symbol.upper()
-            if symbol not in self.transaction_data:
+            position = self._positions.get(symbol)
+            if position is None:
                 return f"❌ No transaction history found for {symbol}"
             
-            transactions = self.transaction_data[symbol]
-            total_shares = sum(tx['shares'] for tx in transactions if tx['action'] == 'BUY')
-            total_invested = sum(tx['total'] for tx in transactions if tx['action'] == 'BUY')
-            avg_cost = total_invested / total_shares if total_shares > 0 else 0
-            
-            currency = "£" if symbol == "LLOY.L" else "$"
+            total_shares = position["total_shares"]
+            total_invested = position["total_invested"]
+            avg_cost = position["avg_cost"]
+            currency = position["currency"]
             
             # If no current price provided, we'll work with what we have
             if current_price:
@@ -634,27 +773,31 @@ Returns:
                 pnl_emoji = "📈" if unrealized_pnl >= 0 else "📉"
                 pnl_color = "🟢" if unrealized_pnl >= 0 else "🔴"
                 
-                result = f"📊 **{symbol} Position Analysis**\n\n"
-                result += f"• **Shares Owned**: {total_shares:,}\n"
-                result += f"• **Average Cost**: {currency}{avg_cost:.2f}\n"
-                result += f"• **Total Invested**: {currency}{total_invested:,.2f}\n"
-                result += f"• **Current Price**: {currency}{current_price:.2f}\n"
-                result += f"• **Current Value**: {currency}{current_value:,.2f}\n"
-                result += f"• **Unrealized P&L**: {pnl_color} {currency}{abs(unrealized_pnl):,.2f} ({pnl_percent:+.1f}%) {pnl_emoji}\n\n"
+                parts = [
+                    f"📊 **{symbol} Position Analysis**\n\n",
+                    f"• **Shares Owned**: {total_shares:,}\n",
+                    f"• **Average Cost**: {currency}{avg_cost:.2f}\n",
+                    f"• **Total Invested**: {currency}{total_invested:,.2f}\n",
+                    f"• **Current Price**: {currency}{current_price:.2f}\n",
+                    f"• **Current Value**: {currency}{current_value:,.2f}\n",
+                    f"• **Unrealized P&L**: {pnl_color} {currency}{abs(unrealized_pnl):,.2f} ({pnl_percent:+.1f}%) {pnl_emoji}\n\n",
+                ]
                 
                 # Add contextual advice
                 if unrealized_pnl > 0:
-                    result += f"💡 **Insight**: Strong performance! Consider taking some profits or holding for long-term growth."
+                    parts.append("💡 **Insight**: Strong performance! Consider taking some profits or holding for long-term growth.")
                 else:
-                    result += f"💡 **Insight**: Position is underwater. Consider dollar-cost averaging if you believe in long-term prospects."
+                    parts.append("💡 **Insight**: Position is underwater. Consider dollar-cost averaging if you believe in long-term prospects.")
             else:
-                result = f"📊 **{symbol} Position Summary**\n\n"
-                result += f"• **Shares Owned**: {total_shares:,}\n"
-                result += f"• **Average Cost**: {currency}{avg_cost:.2f}\n"
-                result += f"• **Total Invested**: {currency}{total_invested:,.2f}\n"
-                result += f"• **Purchase History**: {len(transactions)} transactions\n"
-                
-            return result
+                parts = [
+                    f"📊 **{symbol} Position Summary**\n\n",
+                    f"• **Shares Owned**: {total_shares:,}\n",
+                    f"• **Average Cost**: {currency}{avg_cost:.2f}\n",
+                    f"• **Total Invested**: {currency}{total_invested:,.2f}\n",
+                    f"• **Purchase History**: {position['transaction_count']} transactions\n",
+                ]
+                
+            return "".join(parts)
             
         except Exception as e:
             return f"❌ Error analyzing position: {str(e)}"
@@ -675,35 +818,25 @@ Returns:
         """
         try:
             if symbol.upper() == "ALL":
-                result = "💰 **Portfolio Cost Basis Summary**\n\n"
-                
-                for stock_symbol in self.transaction_data.keys():
-                    transactions = self.transaction_data[stock_symbol]
-                    total_shares = sum(tx['shares'] for tx in transactions if tx['action'] == 'BUY')
-                    total_invested = sum(tx['total'] for tx in transactions if tx['action'] == 'BUY')
-                    avg_cost = total_invested / total_shares if total_shares > 0 else 0
-                    currency = "£" if stock_symbol == "LLOY.L" else "$"
-                    
-                    result += f"**{stock_symbol}**: {total_shares:,} shares @ {currency}{avg_cost:.2f} avg cost\n"
-                
-                return result
+                parts = ["💰 **Portfolio Cost Basis Summary**\n\n"]
+                parts.extend(
+                    f"**{stock_symbol}**: {position['total_shares']:,} shares @ {position['currency']}{position['avg_cost']:.2f} avg cost\n"
+                    for stock_symbol, position in self._positions.items()
+                )
+                return "".join(parts)
             else:
                 symbol = symbol.upper()
-                if symbol not in self.transaction_data:
+                position = self._positions.get(symbol)
+                if position is None:
                     return f"❌ No cost basis data for {symbol}"
                 
-                transactions = self.transaction_data[symbol]
-                total_shares = sum(tx['shares'] for tx in transactions if tx['action'] == 'BUY')
-                total_invested = sum(tx['total'] for tx in transactions if tx['action'] == 'BUY')
-                avg_cost = total_invested / total_shares if total_shares > 0 else 0
-                currency = "£" if symbol == "LLOY.L" else "$"
-                
-                result = f"💰 **{symbol} Cost Basis**\n\n"
-                result += f"• **Average Cost**: {currency}{avg_cost:.2f}\n"
-                result += f"• **Total Shares**: {total_shares:,}\n"
-                result += f"• **Total Investment**: {currency}{total_invested:,.2f}\n"
-                
-                return result
+                currency = position["currency"]
+                return "".join((
+                    f"💰 **{symbol} Cost Basis**\n\n",
+                    f"• **Average Cost**: {currency}{position['avg_cost']:.2f}\n",
+                    f"• **Total Shares**: {position['total_shares']:,}\n",
+                    f"• **Total Investment**: {currency}{position['total_invested']:,.2f}\n",
+                ))
                 
         except Exception as e:
             return f"❌ Error retrieving cost basis: {str(e)}"
@@ -7,16 +7,30 @@ import os
 from fastapi import FastAPI
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import asyncio
-from typing import Dict, List
-import yfinance as yf
+import logging
+from typing import Dict, List, Optional
 import time
 import random
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import httpx
+import orjson
+from cachetools import LRUCache, TTLCache
 
-app = FastAPI(title="PricingAgent", version="1.0.0")
+# Per-lookup chatter is INFO/DEBUG; the default level keeps only failures so the hot path stays quiet
+logging.basicConfig(
+    level=os.getenv("PRICING_LOG_LEVEL", "WARNING").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+)
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release the pooled Yahoo Finance connections on shutdown"""
+    yield
+    await pricing_service.client.aclose()
+
+app = FastAPI(title="PricingAgent", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -27,10 +41,54 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Symbols priced at once by get_multiple_prices (Yahoo calls are still spaced by the rate limiter)
+MAX_CONCURRENT_FETCHES = 8
+
+# Symbols per batched Quote API request (keeps the query string well under URL length limits)
+QUOTE_BATCH_SIZE = 50
+
+# Most symbols kept in the price cache; least recently used entries are evicted past this
+PRICE_CACHE_MAX_SYMBOLS = 1024
+
+# Seconds a symbol that every live source failed for goes straight to simulated data
+NEGATIVE_CACHE_TTL = 10
+
+# Yahoo Finance endpoints and request headers are fixed, so they're built once at import
+_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/"
+# Only the chart meta is read - a single daily bar keeps Yahoo from sending intraday series to parse
+_CHART_QUERY = "?range=1d&interval=1d"
+_QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote?symbols="
+_QUOTE_SUMMARY_URL = "https://query1.finance.yahoo.com/v10/finance/quoteSummary/"
+_CHART_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': '*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Upgrade-Insecure-Requests': '1',
+}
+_JSON_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json'
+}
+
+# Display symbol by ISO currency code, then by exchange suffix for tickers with no currency field
+_CURRENCY_BY_CCY = {
+    'USD': '$',
+    'GBP': '£',
+    'EUR': '€',
+    'GBX': 'p',  # British pence
+}
+_SUFFIX_CURRENCY = (
+    ('.L', '£'),   # London Stock Exchange
+    ('.PA', '€'),  # Paris
+    ('.DE', '€'),  # Frankfurt
+    ('.MI', '€'),  # Milan
+)
+
 class PricingService:
     def __init__(self):
-        self.cache = {}
-        self.cache_timestamps = {}
+        # symbol -> (monotonic expiry, payload), bounded so arbitrary lookups can't grow it forever
+        self.cache: LRUCache = LRUCache(maxsize=PRICE_CACHE_MAX_SYMBOLS)
         self.cache_ttl = 60  # 1 minute cache for more frequent real-time updates
         self.request_count = 0
         self.last_request_time = 0
@@ -38,18 +96,31 @@ class PricingService:
         self.max_request_interval = 15.0  # Cap at 15 seconds max
         self.consecutive_failures = 0  # Track consecutive failures for backoff
         self.success_count = 0  # Track successful requests
-        self.success_count = 0  # Track successful requests
         
-        # Setup requests session with retry strategy
-        self.session = requests.Session()
-        retry_strategy = Retry(
-            total=3,
-            backoff_factor=2,  # Exponential backoff: 1, 2, 4 seconds
-            status_forcelist=[429, 500, 502, 503, 504],
+        # Async HTTP/2 client: concurrent Yahoo lookups multiplex over one kept-alive TLS connection
+        # instead of paying a handshake each. The transport retries failed connects; status-code
+        # backoff is left to _rate_limit_request
+        self.client = httpx.AsyncClient(
+            timeout=15,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONCURRENT_FETCHES,
+                    max_keepalive_connections=MAX_CONCURRENT_FETCHES,
+                    keepalive_expiry=60,
+                ),
+            ),
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("http://", adapter)
-        self.session.mount("https://", adapter)
+        self._fetch_slots = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+        self._rate_limit_lock = asyncio.Lock()
+        
+        # Symbols that just failed every live source - skip Yahoo (and the rate-limit wait) briefly
+        # instead of repeating the same failing round trips during an outage or 429 burst
+        self.neg_cache = TTLCache(maxsize=PRICE_CACHE_MAX_SYMBOLS, ttl=NEGATIVE_CACHE_TTL)
+        
+        # In-flight lookups keyed by symbol (request coalescing)
+        self._inflight: Dict[str, asyncio.Task] = {}
         
         # More realistic fallback prices (updated October 2024)
         self._fallback_prices = {
@@ -66,157 +137,200 @@ class PricingService:
     def get_currency_symbol(self, symbol: str, ticker_info: dict) -> str:
         """Determine currency symbol based on stock exchange"""
         # Try to get currency from ticker info first
-        if 'currency' in ticker_info:
-            currency = ticker_info['currency'].upper()
-            currency_map = {
-                'USD': '$',
-                'GBP': '£',
-                'EUR': '€',
-                'GBX': 'p',  # British pence
-            }
-            if currency in currency_map:
-                return currency_map[currency]
+        currency = _CURRENCY_BY_CCY.get((ticker_info.get('currency') or '').upper())
+        if currency:
+            return currency
         
-        # Fallback: determine by symbol suffix
-        if '.L' in symbol:  # London Stock Exchange
-            return '£'
-        elif '.PA' in symbol or '.DE' in symbol or '.MI' in symbol:  # Paris, Frankfurt, Milan
-            return '€'
-        else:  # Default to USD for US stocks
-            return '$'
+        # Fallback: determine by symbol suffix, defaulting to USD for US stocks
+        return next((sign for suffix, sign in _SUFFIX_CURRENCY if suffix in symbol), '$')
 
-    def _rate_limit_request(self):
+    async def _rate_limit_request(self):
         """Smart rate limiting that adapts based on success/failure rate"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        # Calculate effective interval based on recent success/failure pattern
-        if self.consecutive_failures > 0:
-            # Exponential backoff for failures, but more moderate
-            backoff_multiplier = min(1.5 ** self.consecutive_failures, 5.0)
-            effective_interval = self.min_request_interval * backoff_multiplier
-        else:
-            # Use base interval when successful
-            effective_interval = self.min_request_interval
+        # Concurrent lookups take turns here, so the spacing holds without blocking the event loop
+        async with self._rate_limit_lock:
+            current_time = time.monotonic()
+            time_since_last = current_time - self.last_request_time
+            
+            # Calculate effective interval based on recent success/failure pattern
+            if self.consecutive_failures > 0:
+                # Exponential backoff for failures, but more moderate
+                backoff_multiplier = min(1.5 ** self.consecutive_failures, 5.0)
+                effective_interval = self.min_request_interval * backoff_multiplier
+            else:
+                # Use base interval when successful
+                effective_interval = self.min_request_interval
+                
+            effective_interval = min(effective_interval, self.max_request_interval)
+            
+            if time_since_last < effective_interval:
+                sleep_time = effective_interval - time_since_last
+                logger.info("⏱️ Rate limiting: sleeping for %.2f seconds (failures: %d)", sleep_time, self.consecutive_failures)
+                await asyncio.sleep(sleep_time)
             
-        effective_interval = min(effective_interval, self.max_request_interval)
+            self.last_request_time = time.monotonic()
+            self.request_count += 1
+
+    def _get_cached(self, symbol: str) -> Optional[dict]:
+        """Return the cached payload for a symbol if it is still within the TTL"""
+        # One lookup yields expiry and payload; the monotonic clock can't be moved by NTP adjustments
+        entry = self.cache.get(symbol)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _cache_put(self, symbol: str, payload: dict):
+        """Cache a payload for cache_ttl seconds"""
+        self.cache[symbol] = (time.monotonic() + self.cache_ttl, payload)
+
+    def _build_quote_payload(self, symbol: str, meta: dict, source: str) -> Optional[dict]:
+        """Build the price payload from Chart API meta or a Quote API result, or None if it has no usable price"""
+        price = meta.get('regularMarketPrice') or meta.get('previousClose')
+        if not price or price <= 0:
+            return None
+        
+        # The Quote API reports change fields directly; chart meta only has the previous close
+        previous_close = (meta.get('regularMarketPreviousClose') or meta.get('previousClose')
+                          or meta.get('chartPreviousClose') or price)
+        change = meta.get('regularMarketChange', price - previous_close)
+        change_percent = meta.get('regularMarketChangePercent', (change / previous_close * 100) if previous_close else 0.0)
+        
+        return {
+            "symbol": symbol,
+            "price": round(price, 2),
+            "currency": self.get_currency_symbol(symbol, meta),
+            "change": round(change, 2),
+            "change_percent": round(change_percent, 2),
+            "day_high": meta.get('regularMarketDayHigh', price),
+            "day_low": meta.get('regularMarketDayLow', price),
+            "previous_close": previous_close,
+            "pre_market_price": meta.get('preMarketPrice'),
+            "pre_market_change": meta.get('preMarketChange'),
+            "pre_market_change_percent": meta.get('preMarketChangePercent'),
+            "is_market_open": meta.get('marketState') == 'REGULAR',
+            "last_updated": f"Real-time via {source}"
+        }
+
+    @staticmethod
+    def _flatten_summary_price(price: dict) -> dict:
+        """Reduce a quoteSummary price module to Quote API shaped fields"""
+        # Numbers arrive as {"raw": ..., "fmt": ...} and percents as fractions; empty objects are dropped
+        # so _build_quote_payload's defaults apply
+        fields = {}
+        for key, value in price.items():
+            if isinstance(value, dict):
+                value = value.get('raw')
+            if value is not None:
+                fields[key] = value
+        for key in ('regularMarketChangePercent', 'preMarketChangePercent'):
+            if key in fields:
+                fields[key] *= 100
+        return fields
+
+    async def _batch_quote(self, symbols: List[str]) -> Dict[str, dict]:
+        """Fetch Quote API payloads for several symbols in a single request"""
+        await self._rate_limit_request()
         
-        if time_since_last < effective_interval:
-            sleep_time = effective_interval - time_since_last
-            print(f"⏱️ Rate limiting: sleeping for {sleep_time:.2f} seconds (failures: {self.consecutive_failures})")
-            time.sleep(sleep_time)
+        try:
+            response = await self.client.get(_QUOTE_URL + ",".join(symbols), headers=_JSON_HEADERS, timeout=10)
+            logger.debug("📡 Batch Quote API response for %d symbols: %s", len(symbols), response.status_code)
+            
+            if response.status_code != 200:
+                return {}
+            
+            requested = set(symbols)
+            payloads = {}
+            for quote in orjson.loads(response.content).get('quoteResponse', {}).get('result') or []:
+                symbol = quote.get('symbol')
+                if symbol in requested:
+                    payload = self._build_quote_payload(symbol, quote, "Quote API")
+                    if payload:
+                        payloads[symbol] = payload
+        except Exception as e:
+            logger.warning("⚠️ Batch Quote API failed for %d symbols: %s", len(symbols), e)
+            return {}
         
-        self.last_request_time = time.time()
-        self.request_count += 1
+        if payloads:
+            self.consecutive_failures = 0
+            self.success_count += len(payloads)
+            logger.info("✅ Batch Quote API success for %d/%d symbols", len(payloads), len(symbols))
+        return payloads
 
     async def get_price_from_yahoo_direct(self, symbol: str) -> dict:
         """Try multiple Yahoo Finance endpoints with different strategies"""
         
         # Strategy 1: Try the chart API (most reliable)
         try:
-            url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': '*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = self.session.get(url, headers=headers, timeout=15)
-            print(f"📡 Chart API response for {symbol}: {response.status_code}")
+            response = await self.client.get(_CHART_URL + symbol + _CHART_QUERY, headers=_CHART_HEADERS, timeout=15)
+            logger.debug("📡 Chart API response for %s: %s", symbol, response.status_code)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 chart = data.get('chart', {})
                 if 'result' in chart and chart['result'] and len(chart['result']) > 0:
-                    result = chart['result'][0]
-                    meta = result.get('meta', {})
-                    
-                    # Get the latest price
-                    price = meta.get('regularMarketPrice') or meta.get('previousClose')
-                    if price and price > 0:
-                        currency = self.get_currency_symbol(symbol, meta)
-                        previous_close = meta.get('previousClose', price)
-                        change = price - previous_close
-                        change_percent = (change / previous_close * 100) if previous_close != 0 else 0.0
-                        
-                        print(f"✅ Chart API success for {symbol}: ${price}")
-                        return {
-                            "symbol": symbol,
-                            "price": round(price, 2),
-                            "currency": currency,
-                            "change": round(change, 2),
-                            "change_percent": round(change_percent, 2),
-                            "day_high": meta.get('regularMarketDayHigh', price),
-                            "day_low": meta.get('regularMarketDayLow', price),
-                            "previous_close": previous_close,
-                            "pre_market_price": meta.get('preMarketPrice'),
-                            "pre_market_change": meta.get('preMarketChange'),
-                            "pre_market_change_percent": None,
-                            "is_market_open": meta.get('marketState') == 'REGULAR',
-                            "last_updated": "Real-time via Chart API"
-                        }
+                    payload = self._build_quote_payload(symbol, chart['result'][0].get('meta', {}), "Chart API")
+                    if payload:
+                        logger.info("✅ Chart API success for %s: $%s", symbol, payload['price'])
+                        return payload
         except Exception as e:
-            print(f"⚠️ Chart API failed for {symbol}: {e}")
+            logger.warning("⚠️ Chart API failed for %s: %s", symbol, e)
         
         # Strategy 2: Try the quote API as fallback
         try:
-            url = f"https://query1.finance.yahoo.com/v7/finance/quote?symbols={symbol}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-                'Accept': 'application/json'
-            }
-            
-            response = self.session.get(url, headers=headers, timeout=10)
-            print(f"📡 Quote API response for {symbol}: {response.status_code}")
+            response = await self.client.get(_QUOTE_URL + symbol, headers=_JSON_HEADERS, timeout=10)
+            logger.debug("📡 Quote API response for %s: %s", symbol, response.status_code)
             
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 quote_response = data.get('quoteResponse', {})
                 if 'result' in quote_response and quote_response['result']:
-                    quote = quote_response['result'][0]
-                    
-                    price = quote.get('regularMarketPrice')
-                    if price and price > 0:
-                        currency = self.get_currency_symbol(symbol, quote)
-                        previous_close = quote.get('regularMarketPreviousClose', price)
-                        change = quote.get('regularMarketChange', 0)
-                        change_percent = quote.get('regularMarketChangePercent', 0)
-                        
-                        print(f"✅ Quote API success for {symbol}: ${price}")
-                        return {
-                            "symbol": symbol,
-                            "price": round(price, 2),
-                            "currency": currency,
-                            "change": round(change, 2),
-                            "change_percent": round(change_percent, 2),
-                            "day_high": quote.get('regularMarketDayHigh', price),
-                            "day_low": quote.get('regularMarketDayLow', price),
-                            "previous_close": previous_close,
-                            "pre_market_price": quote.get('preMarketPrice'),
-                            "pre_market_change": quote.get('preMarketChange'),
-                            "pre_market_change_percent": quote.get('preMarketChangePercent'),
-                            "is_market_open": quote.get('marketState') == 'REGULAR',
-                            "last_updated": "Real-time via Quote API"
-                        }
+                    payload = self._build_quote_payload(symbol, quote_response['result'][0], "Quote API")
+                    if payload:
+                        logger.info("✅ Quote API success for %s: $%s", symbol, payload['price'])
+                        return payload
         except Exception as e:
-            print(f"⚠️ Quote API failed for {symbol}: {e}")
+            logger.warning("⚠️ Quote API failed for %s: %s", symbol, e)
+        
+        # Strategy 3: Try the quote summary API's price module
+        try:
+            response = await self.client.get(_QUOTE_SUMMARY_URL + symbol + "?modules=price", headers=_JSON_HEADERS, timeout=10)
+            logger.debug("📡 Quote Summary API response for %s: %s", symbol, response.status_code)
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                results = data.get('quoteSummary', {}).get('result')
+                if results:
+                    payload = self._build_quote_payload(symbol, self._flatten_summary_price(results[0].get('price', {})), "Quote Summary API")
+                    if payload:
+                        logger.info("✅ Quote Summary API success for %s: $%s", symbol, payload['price'])
+                        return payload
+        except Exception as e:
+            logger.warning("⚠️ Quote Summary API failed for %s: %s", symbol, e)
         
         return None
 
     async def get_price(self, symbol: str) -> dict:
         """Get current price and market data for a symbol from Yahoo Finance with rate limiting"""
         # Check cache with TTL (time-to-live) for real-time updates
-        current_time = time.time()
-        if (symbol in self.cache and 
-            symbol in self.cache_timestamps and 
-            current_time - self.cache_timestamps[symbol] < self.cache_ttl):
-            return self.cache[symbol]
+        cached = self._get_cached(symbol)
+        if cached is not None:
+            return cached
+        if symbol in self.neg_cache:
+            return self._fallback_payload(symbol)
+        
+        # Concurrent misses for the same symbol await one fetch instead of each calling Yahoo
+        task = self._inflight.get(symbol)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_price(symbol))
+            self._inflight[symbol] = task
+            task.add_done_callback(lambda _: self._inflight.pop(symbol, None))
         
+        # shield() keeps the shared fetch running if this particular caller is cancelled
+        return await asyncio.shield(task)
+    
+    async def _fetch_price(self, symbol: str) -> dict:
+        """Fetch a symbol's price from the direct Yahoo APIs, falling back to simulated data"""
         # Apply rate limiting before making API request
-        self._rate_limit_request()
+        await self._rate_limit_request()
         
         # Try direct Yahoo Finance API first (more reliable for cloud deployments)
         direct_result = await self.get_price_from_yahoo_direct(symbol)
@@ -224,121 +338,25 @@ class PricingService:
             # Success! Reset failure counter and cache the result
             self.consecutive_failures = 0
             self.success_count += 1
-            self.cache[symbol] = direct_result
-            self.cache_timestamps[symbol] = current_time
+            self._cache_put(symbol, direct_result)
             trend = "📈" if direct_result['change'] >= 0 else "📉"
-            print(f"✅ Direct Yahoo API SUCCESS: {symbol} = {direct_result['currency']}{direct_result['price']:.2f} ({trend} {direct_result['change']:+.2f}, {direct_result['change_percent']:+.2f}%) - Success #{self.success_count}")
+            logger.info(
+                "✅ Direct Yahoo API SUCCESS: %s = %s%.2f (%s %+.2f, %+.2f%%) - Success #%d",
+                symbol, direct_result['currency'], direct_result['price'], trend,
+                direct_result['change'], direct_result['change_percent'], self.success_count,
+            )
             return direct_result
-        else:
-            # Direct API failed, increment failure counter
-            self.consecutive_failures += 1
-            print(f"❌ Direct Yahoo API failed for {symbol} - Failure #{self.consecutive_failures}")
         
-        # Fallback to yfinance library
-        try:
-            ticker = yf.Ticker(symbol)
-            
-            # Try multiple methods to get price data
-            price = None
-            info = None
-            
-            # Method 1: Try to get info (most comprehensive but can fail with 429)
-            try:
-                info = ticker.info
-                if 'currentPrice' in info and info['currentPrice']:
-                    price = float(info['currentPrice'])
-                elif 'regularMarketPrice' in info and info['regularMarketPrice']:
-                    price = float(info['regularMarketPrice'])
-                elif 'previousClose' in info and info['previousClose']:
-                    price = float(info['previousClose'])
-                    
-                # Success - reset consecutive failures
-                if price and price > 0:
-                    self.consecutive_failures = 0
-                    self.success_count += 1
-                    
-            except Exception as e:
-                self.consecutive_failures += 1
-                print(f"⚠️ Method 1 (info) failed for {symbol}: {e}")
-                # Check if it's a rate limit error
-                if "429" in str(e) or "Too Many Requests" in str(e):
-                    print(f"🚫 Rate limit hit for {symbol}, consecutive failures: {self.consecutive_failures}")
-                    # Skip to fallback immediately for rate limit errors
-                    price = None
-            
-            # Method 2: Try history if info failed (more reliable for basic price)
-            if price is None or price <= 0:
-                try:
-                    hist = ticker.history(period="1d", interval="5m")
-                    if not hist.empty and 'Close' in hist.columns:
-                        price = float(hist['Close'].iloc[-1])
-                        print(f"📊 Using history method for {symbol}: ${price:.2f}")
-                        # Success - reset consecutive failures
-                        self.consecutive_failures = 0
-                        self.success_count += 1
-                except Exception as e:
-                    self.consecutive_failures += 1
-                    print(f"⚠️ Method 2 (history) failed for {symbol}: {e}")
-                    if "429" in str(e) or "Too Many Requests" in str(e):
-                        print(f"🚫 Rate limit hit on history for {symbol}, consecutive failures: {self.consecutive_failures}")
-            
-            if price and price > 0:
-                currency = self.get_currency_symbol(symbol, info or {})
-                
-                # Get additional market data if info is available
-                if info:
-                    change = info.get('regularMarketChange', 0.0)
-                    day_high = info.get('regularMarketDayHigh', price)
-                    day_low = info.get('regularMarketDayLow', price)
-                    previous_close = info.get('regularMarketPreviousClose', price)
-                    
-                    # Calculate change percentage manually for accuracy
-                    change_percent = (change / previous_close * 100) if previous_close != 0 else 0.0
-                    
-                    # Pre-market data if available
-                    pre_market_price = info.get('preMarketPrice')
-                    pre_market_change = info.get('preMarketChange', 0.0)
-                    pre_market_change_percent = (pre_market_change / previous_close * 100) if previous_close != 0 and pre_market_price else 0.0
-                else:
-                    # Basic data when only price is available
-                    change = 0.0
-                    change_percent = 0.0
-                    day_high = price
-                    day_low = price
-                    previous_close = price
-                    pre_market_price = None
-                    pre_market_change = None
-                    pre_market_change_percent = None
-                
-                result = {
-                    "symbol": symbol,
-                    "price": price,
-                    "currency": currency,
-                    "change": round(change, 2),
-                    "change_percent": round(change_percent, 2),
-                    "day_high": day_high,
-                    "day_low": day_low,
-                    "previous_close": previous_close,
-                    "pre_market_price": pre_market_price,
-                    "pre_market_change": round(pre_market_change, 2) if pre_market_price else None,
-                    "pre_market_change_percent": round(pre_market_change_percent, 2) if pre_market_price else None,
-                    "is_market_open": info.get('regularMarketTime') is not None if info else True,
-                    "last_updated": info.get('regularMarketTime', 'Real-time') if info else 'Real-time'
-                }
-                
-                self.cache[symbol] = result
-                self.cache_timestamps[symbol] = current_time
-                trend = "📈" if change >= 0 else "📉"
-                print(f"✅ Yahoo Finance: {symbol} = {currency}{price:.2f} ({trend} {change:+.2f}, {change_percent:+.2f}%)")
-                return result
-            else:
-                print(f"⚠️ Yahoo Finance returned invalid price for {symbol}, using fallback")
-                
-        except Exception as e:
-            self.consecutive_failures += 1
-            print(f"⚠️ Yahoo Finance error for {symbol}: {e}, using fallback")
+        # Direct API failed, increment failure counter
+        self.consecutive_failures += 1
+        logger.warning("❌ Direct Yahoo API failed for %s - Failure #%d", symbol, self.consecutive_failures)
         
-        # Final fallback to simulated prices (with small random variations for demo)
+        # Every live source failed - remember that briefly, then serve simulated data
+        self.neg_cache[symbol] = True
+        return self._fallback_payload(symbol)
+    
+    def _fallback_payload(self, symbol: str) -> dict:
+        """Simulated price payload used when no live source is available"""
         base_price = self._fallback_prices.get(symbol, 100.0)
         # Add small random variation (-2% to +2%) to simulate price changes
         price_variation = random.uniform(-0.02, 0.02)
@@ -350,7 +368,10 @@ class PricingService:
         change_percent = round((change / previous_close) * 100, 2)
         
         currency = self.get_currency_symbol(symbol, {})
-        print(f"📊 Using simulated price for {symbol}: {currency}{fallback_price} (change: {change:+.2f}) - Consecutive failures: {self.consecutive_failures}")
+        logger.info(
+            "📊 Using simulated price for %s: %s%s (change: %+.2f) - Consecutive failures: %d",
+            symbol, currency, fallback_price, change, self.consecutive_failures,
+        )
         
         return {
             "symbol": symbol,
@@ -368,20 +389,46 @@ class PricingService:
             "last_updated": f"Fallback data (rate limited - {self.consecutive_failures} failures)"
         }
     
+    async def _get_price_limited(self, symbol: str) -> dict:
+        """Get price while holding one of the batch fetch slots"""
+        async with self._fetch_slots:
+            return await self.get_price(symbol)
+    
     async def get_multiple_prices(self, symbols: List[str]) -> Dict[str, dict]:
-        """Get prices for multiple symbols with enhanced rate limiting"""
+        """Get prices for multiple symbols concurrently with enhanced rate limiting"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        
         prices = {}
-        for i, symbol in enumerate(symbols):
-            price_data = await self.get_price(symbol)
-            prices[symbol] = price_data
-            
-            # Progressive delay to be more conservative with multiple requests
-            if i < len(symbols) - 1:  # Don't sleep after the last symbol
-                delay = min(0.5 + (i * 0.1), 2.0)  # Progressive delay: 0.5s, 0.6s, 0.7s... up to 2s
-                print(f"⏱️ Waiting {delay:.1f}s before next request ({i+1}/{len(symbols)} completed)")
-                await asyncio.sleep(delay)
+        misses = []
+        for symbol in unique_symbols:
+            cached = self._get_cached(symbol)
+            if cached is not None:
+                prices[symbol] = cached
+            else:
+                misses.append(symbol)
+        
+        # One Quote API round trip per QUOTE_BATCH_SIZE misses instead of one or two per symbol
+        for start in range(0, len(misses), QUOTE_BATCH_SIZE):
+            batch = await self._batch_quote(misses[start:start + QUOTE_BATCH_SIZE])
+            for symbol, payload in batch.items():
+                self._cache_put(symbol, payload)
+                prices[symbol] = payload
+        
+        # Symbols the batch couldn't price keep the per-symbol chart/quote/fallback path.
+        # Their round trips overlap; _rate_limit_request still spaces the Yahoo calls
+        remaining = [symbol for symbol in misses if symbol not in prices]
+        results = await asyncio.gather(
+            *(self._get_price_limited(symbol) for symbol in remaining), return_exceptions=True
+        )
+        for symbol, result in zip(remaining, results):
+            if isinstance(result, Exception):
+                prices[symbol] = {"error": str(result), "symbol": symbol}
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                prices[symbol] = result
         
-        return prices
+        return {symbol: prices[symbol] for symbol in unique_symbols}
 
 # Initialize pricing service
 pricing_service = PricingService()
@@ -429,15 +476,6 @@ async def get_single_price(symbol: str):
     except Exception as e:
         return {"error": str(e), "symbol": symbol}
 
-@app.get("/price/{symbol}")
-async def get_single_price(symbol: str):
-    """Get price for a single stock symbol (compatible with orchestrator)"""
-    try:
-        price_data = await pricing_service.get_price(symbol.upper())
-        return price_data
-    except Exception as e:
-        return {"error": str(e), "symbol": symbol}
-
 @app.post("/prices")
 async def get_multiple_prices(symbols: List[str]):
     """Get prices for multiple stock symbols"""
@@ -459,6 +497,7 @@ def health_status():
         "status": "healthy",
         "data_source": "yahoo_finance",
         "cache_size": len(pricing_service.cache),
+        "cache_max": pricing_service.cache.maxsize,
         "fallback_symbols": len(pricing_service._fallback_prices),
         "capabilities": ["stock.pricing", "market.data", "yahoo.finance.integration"]
     }
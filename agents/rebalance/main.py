@@ -4,17 +4,31 @@ Uses Microsoft Semantic Kernel for portfolio optimization and agent communicatio
 """
 
 import os
+import sys
 import asyncio
-from typing import Dict, List, Optional
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
-import json
+import re
+import numpy as np
+import orjson
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 import httpx
 from dotenv import load_dotenv
 
+# Repository root; running as a script puts agents/rebalance on sys.path instead, so it is added
+# for the package import below
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not __package__:
+    sys.path.insert(0, _REPO_ROOT)
+
+from agents.rebalance.rebalance_core import held_values, normalize_prices, plan_trades, value_positions
+
 # Semantic Kernel imports
 import semantic_kernel as sk
 from semantic_kernel.functions import kernel_function
@@ -29,10 +43,47 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Optional shared price cache for multi-worker deployments
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 # Load environment variables
 load_dotenv()
 
-app = FastAPI(title="SK RebalanceAgent", description="Semantic Kernel A2A Portfolio Rebalancing Agent")
+# Seconds a fetched price is reused from Redis - one AI plan prices the same symbols several times
+PRICE_CACHE_TTL = 10
+
+# Plans with at least this many positions + targets are computed in a worker thread; smaller ones
+# finish faster than the hop to the thread pool
+PLAN_THREAD_MIN_ROWS = 500
+
+# Prices prefetched for the AI plan being generated; the SK functions the model calls during that
+# request read them here instead of each asking PricingAgent again
+_REQUEST_PRICES: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_prices", default=None)
+
+# Valuations of the portfolio JSON the model passes to the SK functions during that request, keyed
+# by the JSON string: each function call after the first reuses the same positions, prices and values
+_REQUEST_VALUATIONS: ContextVar[Optional[dict]] = ContextVar("request_valuations", default=None)
+
+# Allocation status by how many percentage points a weight is off target: < 2, < 5, or more
+_STATUS_THRESHOLDS = np.array([2.0, 5.0])
+_STATUS_EMOJIS = ("✅", "⚠️", "❌")
+
+# Cleanup applied to every AI plan: markdown ```html fences, then everything outside <body>
+_FENCE_RE = re.compile(r"^```html\s*|\s*```$")
+_BODY_RE = re.compile(r"<body>(.*?)</body>", re.DOTALL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the agent's shared resources at startup and release them on shutdown"""
+    await rebalance_agent.startup()
+    yield
+    await rebalance_agent.shutdown()
+
+app = FastAPI(title="SK RebalanceAgent", description="Semantic Kernel A2A Portfolio Rebalancing Agent", default_response_class=ORJSONResponse, lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -74,6 +125,71 @@ class RebalancePlanResponse(BaseModel):
     trades: List[Trade]
     notes: List[str]
 
+def _request_symbols(request: RebalancePlanRequest) -> List[str]:
+    """Every symbol a plan prices once: the portfolio's, then target-only ones, without duplicates"""
+    return list(dict.fromkeys([pos.symbol for pos in request.portfolio.positions] + list(request.targets)))
+
+def _compute_plan(request: RebalancePlanRequest, symbols: List[str], prices: Dict[str, float]) -> RebalancePlanResponse:
+    """The rebalancing math behind generate_rebalance_plan, once prices are known"""
+    portfolio = request.portfolio
+    targets = request.targets
+    constraints = request.constraints
+    
+    # Calculate current portfolio state in one vectorized pass
+    index, values, total_value = value_positions(symbols, (pos.quantity for pos in portfolio.positions), prices)
+    
+    # Generate trades to reach target allocation - only significant differences, within the turnover budget
+    planned, budget_reached = plan_trades(
+        index,
+        values,
+        total_value,
+        targets,
+        prices,
+        constraints.maxTurnover,
+        constraints.minTradeValue,
+    )
+    # Every field comes from the math above, so the models are built without re-validation
+    trades = [
+        Trade.model_construct(
+            symbol=symbol,
+            side="BUY" if difference > 0 else "SELL",
+            quantity=round(quantity_needed, 2),
+            estPrice=current_price,
+            reason="Reduce overweight" if difference < 0 else "Increase underweight"
+        )
+        for symbol, difference, quantity_needed, current_price in planned
+    ]
+    notes = ["Turnover budget reached; some trades skipped."] if budget_reached else []
+    
+    if len(trades) == 0:
+        notes.append("Portfolio is already well-balanced within constraints.")
+    
+    return RebalancePlanResponse.model_construct(
+        currentValue=total_value,
+        trades=trades,
+        notes=notes
+    )
+
+def _clean_ai_analysis(text: str) -> str:
+    """Strip markdown ```html fences and keep only the <body> content, ready for embedding"""
+    text = _FENCE_RE.sub("", text).strip()
+    body_match = _BODY_RE.search(text)
+    if body_match:
+        text = body_match.group(1).strip()
+    return text
+
+def _plan_summary(plan: RebalancePlanResponse) -> dict:
+    """Traditional plan as the plain dict embedded in the AI plan responses"""
+    return {
+        "currentValue": plan.currentValue,
+        "trades": [trade.__dict__ for trade in plan.trades],
+        "notes": plan.notes
+    }
+
+def _sse_event(payload) -> bytes:
+    """Frame a payload as a Server-Sent Event"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
 class SKRebalanceAgent:
     def __init__(self):
         # Get pricing agent URL from environment
@@ -81,6 +197,19 @@ class SKRebalanceAgent:
         pricing_port = os.getenv("PRICING_AGENT_PORT", "8011")
         self.pricing_agent_url = f"http://{agent_host}:{pricing_port}"
         
+        # Pooled client for PricingAgent calls, opened in startup() inside the worker's event loop
+        self.http_client: Optional[httpx.AsyncClient] = None
+        
+        # Shared price cache, only when configured so local dev needs no Redis
+        self.redis = None
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self.redis = aioredis.Redis.from_url(redis_url)
+                logger.info("✅ Shared Redis price cache enabled")
+            else:
+                logger.warning("⚠️ REDIS_URL is set but the redis package is not installed")
+        
         # Initialize Semantic Kernel
         self.kernel = sk.Kernel()
         self.chat_service = None
@@ -112,6 +241,23 @@ class SKRebalanceAgent:
         except Exception as e:
             print(f"⚠️ SK setup warning: {e}")
     
+    async def startup(self):
+        """Open the pooled PricingAgent client"""
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            )
+    
+    async def shutdown(self):
+        """Release the agent's connections"""
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+    
     
     @kernel_function(
         name="calculate_portfolio_value",
@@ -120,24 +266,12 @@ class SKRebalanceAgent:
     async def sk_calculate_portfolio_value(self, portfolio_json: str) -> str:
         """SK function to calculate portfolio value with detailed breakdown"""
         try:
-            portfolio_data = json.loads(portfolio_json)
-            positions = portfolio_data.get('positions', [])
+            positions, prices, _, values, total_value = await self._value_portfolio(portfolio_json)
             
-            # Get current prices
-            symbols = [pos['symbol'] for pos in positions]
-            prices = await self.get_current_prices(symbols)
-            
-            total_value = 0.0
-            breakdown = []
-            
-            for pos in positions:
-                symbol = pos['symbol']
-                quantity = pos['quantity']
-                current_price = prices.get(symbol, 100.0)
-                position_value = quantity * current_price
-                total_value += position_value
-                
-                breakdown.append(f"{symbol}: {quantity} shares @ ${current_price:.2f} = ${position_value:,.2f}")
+            breakdown = [
+                f"{pos['symbol']}: {pos['quantity']} shares @ ${prices.get(pos['symbol'], 100.0):.2f} = ${position_value:,.2f}"
+                for pos, position_value in zip(positions, values.tolist())
+            ]
             
             result = f"Portfolio Total Value: ${total_value:,.2f}\n\nBreakdown:\n" + "\n".join(breakdown)
             return result
@@ -153,40 +287,33 @@ class SKRebalanceAgent:
     async def sk_analyze_allocation(self, portfolio_json: str, targets_json: str) -> str:
         """SK function to analyze allocation differences"""
         try:
-            portfolio_data = json.loads(portfolio_json)
-            targets = json.loads(targets_json)
-            positions = portfolio_data.get('positions', [])
-            
-            # Get current prices and calculate values
-            symbols = [pos['symbol'] for pos in positions]
-            prices = await self.get_current_prices(symbols)
+            targets = orjson.loads(targets_json)
+            _, _, index, values, total_value = await self._value_portfolio(portfolio_json)
             
-            total_value = 0.0
-            position_values = {}
+            # Current and target weights for every symbol in one vectorized pass
+            all_symbols = sorted(index.keys() | targets.keys())
+            count = len(all_symbols)
+            current_values = held_values(index, values, all_symbols)
+            current_weights = current_values / total_value * 100 if total_value > 0 else np.zeros(count)
+            target_weights = np.fromiter((targets.get(s, 0.0) for s in all_symbols), dtype=np.float64, count=count) * 100
+            differences = current_weights - target_weights
+            # Bucket every row into its status in one pass
+            statuses = np.digitize(np.abs(differences), _STATUS_THRESHOLDS)
             
-            for pos in positions:
-                symbol = pos['symbol']
-                quantity = pos['quantity']
-                current_price = prices.get(symbol, 100.0)
-                value = quantity * current_price
-                position_values[symbol] = value
-                total_value += value
-            
-            # Calculate current weights
-            analysis = ["Portfolio Allocation Analysis:", ""]
-            analysis.append(f"Total Portfolio Value: ${total_value:,.2f}")
-            analysis.append("")
-            analysis.append("Current vs Target Allocation:")
-            analysis.append("-" * 60)
-            
-            for symbol in sorted(set(list(position_values.keys()) + list(targets.keys()))):
-                current_value = position_values.get(symbol, 0.0)
-                current_weight = (current_value / total_value * 100) if total_value > 0 else 0.0
-                target_weight = targets.get(symbol, 0.0) * 100
-                difference = current_weight - target_weight
-                
-                status = "✅" if abs(difference) < 2 else "⚠️" if abs(difference) < 5 else "❌"
-                analysis.append(f"{status} {symbol:6s} | Current: {current_weight:5.1f}% | Target: {target_weight:5.1f}% | Diff: {difference:+5.1f}%")
+            analysis = [
+                "Portfolio Allocation Analysis:",
+                "",
+                f"Total Portfolio Value: ${total_value:,.2f}",
+                "",
+                "Current vs Target Allocation:",
+                "-" * 60,
+            ]
+            analysis.extend(
+                f"{_STATUS_EMOJIS[status]} {symbol:6s} | Current: {current_weight:5.1f}% | Target: {target_weight:5.1f}% | Diff: {difference:+5.1f}%"
+                for symbol, current_weight, target_weight, difference, status in zip(
+                    all_symbols, current_weights.tolist(), target_weights.tolist(), differences.tolist(), statuses.tolist()
+                )
+            )
             
             return "\n".join(analysis)
             
@@ -200,61 +327,31 @@ class SKRebalanceAgent:
     async def sk_generate_trades(self, portfolio_json: str, targets_json: str, constraints_json: str) -> str:
         """SK function to generate rebalancing trades"""
         try:
-            portfolio_data = json.loads(portfolio_json)
-            targets = json.loads(targets_json)
-            constraints = json.loads(constraints_json)
-            
-            # Get current prices
-            symbols = [pos['symbol'] for pos in portfolio_data['positions']]
-            prices = await self.get_current_prices(symbols)
-            
-            # Calculate current values and positions
-            current_positions = {}
-            total_value = 0.0
-            
-            for pos in portfolio_data['positions']:
-                symbol = pos['symbol']
-                quantity = pos['quantity']
-                current_price = prices.get(symbol, 100.0)
-                value = quantity * current_price
-                
-                current_positions[symbol] = {
-                    'quantity': quantity,
-                    'value': value,
-                    'price': current_price
-                }
-                total_value += value
+            targets = orjson.loads(targets_json)
+            constraints = orjson.loads(constraints_json)
+            _, prices, index, values, total_value = await self._value_portfolio(portfolio_json)
             
             # Generate trades
-            trades = []
-            notes = []
-            max_turnover = constraints.get('maxTurnover', 0.2)
-            min_trade_value = constraints.get('minTradeValue', 100.0)
-            turnover_used = 0.0
-            
-            for target_symbol, target_weight in targets.items():
-                target_value = total_value * target_weight
-                current_value = current_positions.get(target_symbol, {}).get('value', 0.0)
-                difference = target_value - current_value
-                
-                if abs(difference) > min_trade_value and turnover_used < max_turnover:
-                    current_price = prices.get(target_symbol, 100.0)
-                    quantity = abs(difference) / current_price
-                    
-                    trade = {
-                        'symbol': target_symbol,
-                        'side': 'BUY' if difference > 0 else 'SELL',
-                        'quantity': round(quantity, 2),
-                        'estPrice': current_price,
-                        'reason': 'Rebalance to target allocation'
-                    }
-                    trades.append(trade)
-                    
-                    turnover_used += abs(difference) / total_value
-                    
-                    if turnover_used >= max_turnover:
-                        notes.append("Turnover budget reached; some trades skipped.")
-                        break
+            planned, budget_reached = plan_trades(
+                index,
+                values,
+                total_value,
+                targets,
+                prices,
+                constraints.get('maxTurnover', 0.2),
+                constraints.get('minTradeValue', 100.0),
+            )
+            trades = [
+                {
+                    'symbol': symbol,
+                    'side': 'BUY' if difference > 0 else 'SELL',
+                    'quantity': round(quantity, 2),
+                    'estPrice': price,
+                    'reason': 'Rebalance to target allocation'
+                }
+                for symbol, difference, quantity, price in planned
+            ]
+            notes = ["Turnover budget reached; some trades skipped."] if budget_reached else []
             
             result = {
                 'currentValue': total_value,
@@ -262,70 +359,90 @@ class SKRebalanceAgent:
                 'notes': notes
             }
             
-            return json.dumps(result, indent=2)
+            return orjson.dumps(result, option=orjson.OPT_INDENT_2).decode()
             
         except Exception as e:
             return f"Error generating trades: {str(e)}"
     
+    async def _value_portfolio(self, portfolio_json: str) -> tuple:
+        """Positions, prices and (index, values, total) valuation of a portfolio JSON, memoized within an AI plan"""
+        memo = _REQUEST_VALUATIONS.get()
+        if memo is not None and portfolio_json in memo:
+            return memo[portfolio_json]
+        
+        positions = orjson.loads(portfolio_json).get('positions', [])
+        symbols = [pos['symbol'] for pos in positions]
+        prices = await self.get_current_prices(symbols)
+        valuation = (positions, prices, *value_positions(symbols, (pos['quantity'] for pos in positions), prices))
+        if memo is not None:
+            memo[portfolio_json] = valuation
+        return valuation
+    
     async def get_current_prices(self, symbols: List[str]) -> Dict[str, float]:
-        """Get current prices from PricingAgent (try SK version first)"""
-        try:
-            # Try SK PricingAgent first
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(f"{self.sk_pricing_agent_url}/prices", json=symbols)
-                if response.status_code == 200:
-                    data = response.json()
-                    prices_data = data.get("prices", {})
-                    # Handle both formats: {"AAPL": 256.33} or {"AAPL": {"price": 256.33, "currency": "USD"}}
-                    result = {}
-                    for symbol, value in prices_data.items():
-                        if isinstance(value, dict):
-                            result[symbol] = value.get("price", 100.0)
-                        else:
-                            result[symbol] = value
-                    return result
-        except:
-            pass
-            
+        """Get current prices, reusing ones any worker fetched in the last PRICE_CACHE_TTL seconds"""
+        # Within an AI plan, hand back everything prefetched - target-only symbols included
+        scoped = _REQUEST_PRICES.get()
+        if scoped is not None and all(symbol in scoped for symbol in symbols):
+            return dict(scoped)
+        
+        # Duplicate positions would otherwise be looked up, fetched and cached twice
+        symbols = list(dict.fromkeys(symbols))
+        
+        if self.redis is None or not symbols:
+            return await self._fetch_prices(symbols) or {symbol: 100.0 for symbol in symbols}
+        
+        # Per-symbol keys so overlapping symbol sets still share entries
         try:
-            # Fallback to original PricingAgent
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(f"{self.pricing_agent_url}/prices", json=symbols)
-                if response.status_code == 200:
-                    data = response.json()
-                    prices_data = data.get("prices", {})
-                    # Handle both formats
-                    result = {}
-                    for symbol, value in prices_data.items():
-                        if isinstance(value, dict):
-                            result[symbol] = value.get("price", 100.0)
-                        else:
-                            result[symbol] = value
-                    return result
-        except:
-            pass
+            cached = await self.redis.mget([f"price:{symbol}" for symbol in symbols])
+        except Exception as e:
+            logger.warning("⚠️ Redis get failed: %s", e)
+            cached = [None] * len(symbols)
         
-        # Final fallback
-        return {symbol: 100.0 for symbol in symbols}
+        prices = {symbol: float(value) for symbol, value in zip(symbols, cached) if value is not None}
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if not missing:
+            return prices
+        
+        fetched = await self._fetch_prices(missing)
+        if fetched is None:
+            # Placeholder prices are never cached - neither here nor for symbols PricingAgent
+            # couldn't price, which normalize_prices leaves out of fetched
+            prices.update((symbol, 100.0) for symbol in missing)
+            return prices
+        
+        prices.update(fetched)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for symbol, price in fetched.items():
+                    pipe.set(f"price:{symbol}", price, ex=PRICE_CACHE_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning("⚠️ Redis set failed: %s", e)
+        return prices
     
-    async def generate_rebalance_plan_with_ai(self, request: RebalancePlanRequest) -> dict:
-        """Generate portfolio rebalancing plan using SK AI reasoning"""
-        if not self.chat_service:
-            raise ValueError("Semantic Kernel chat service not initialized")
+    async def _fetch_prices(self, symbols: List[str]) -> Optional[Dict[str, float]]:
+        """Get current prices from PricingAgent; None if it can't be reached"""
+        try:
+            response = await self.http_client.post(f"{self.pricing_agent_url}/prices", json=symbols)
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                return normalize_prices(data.get("prices", {}))
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("⚠️ PricingAgent request failed: %s", e)
         
-        # Prepare data as JSON strings for SK functions
-        portfolio_json = json.dumps({
-            "positions": [
-                {"symbol": pos.symbol, "quantity": pos.quantity}
-                for pos in request.portfolio.positions
-            ]
-        })
+        return None
+    
+    def _build_ai_chat(self, request: RebalancePlanRequest) -> Tuple[ChatHistory, AzureChatPromptExecutionSettings]:
+        """Chat history and execution settings for an AI rebalancing plan"""
+        # Prepare data as JSON strings for SK functions; the portfolio goes straight through
+        # pydantic's serializer with only the fields the functions read
+        portfolio_json = request.portfolio.model_dump_json(include={"positions": {"__all__": {"symbol", "quantity"}}})
         
-        targets_json = json.dumps(request.targets)
-        constraints_json = json.dumps({
+        targets_json = orjson.dumps(request.targets).decode()
+        constraints_json = orjson.dumps({
             "maxTurnover": request.constraints.maxTurnover,
             "minTradeValue": request.constraints.minTradeValue
-        })
+        }).decode()
         
         # Create a prompt for the AI to analyze the portfolio
         system_prompt = """You are a professional portfolio manager. You have access to functions that can:
@@ -366,6 +483,32 @@ Include these sections:
         history = ChatHistory()
         history.add_system_message(system_prompt)
         history.add_user_message(user_prompt)
+        return history, settings
+    
+    async def _open_request_scope(self, request: RebalancePlanRequest, prices: Optional[Dict[str, float]] = None) -> Tuple[Token, Token]:
+        """Price every symbol once up front and start a fresh valuation memo for the tool calls the model is about to make"""
+        symbols = _request_symbols(request)
+        if prices is None:
+            prices = await self.get_current_prices(symbols)
+        return (
+            _REQUEST_PRICES.set({symbol: prices.get(symbol, 100.0) for symbol in symbols}),
+            _REQUEST_VALUATIONS.set({}),
+        )
+    
+    @staticmethod
+    def _close_request_scope(tokens: Tuple[Token, Token]):
+        """Drop the request's prefetched prices and valuations"""
+        prices_token, valuations_token = tokens
+        _REQUEST_VALUATIONS.reset(valuations_token)
+        _REQUEST_PRICES.reset(prices_token)
+    
+    async def generate_rebalance_plan_with_ai(self, request: RebalancePlanRequest, prices: Optional[Dict[str, float]] = None) -> dict:
+        """Generate portfolio rebalancing plan using SK AI reasoning; prices may be prefetched for _request_symbols"""
+        if not self.chat_service:
+            raise ValueError("Semantic Kernel chat service not initialized")
+        
+        history, settings = self._build_ai_chat(request)
+        scope_tokens = await self._open_request_scope(request, prices)
         
         # Get AI response with auto function calling
         try:
@@ -375,25 +518,9 @@ Include these sections:
                 kernel=self.kernel
             )
             
-            ai_analysis = str(response[0])
-            
-            # Clean up the response - remove markdown code blocks if present
-            if ai_analysis.startswith("```html"):
-                ai_analysis = ai_analysis[7:]  # Remove ```html
-            if ai_analysis.endswith("```"):
-                ai_analysis = ai_analysis[:-3]  # Remove ```
-            ai_analysis = ai_analysis.strip()
-            
-            # Remove <!DOCTYPE> and <html> tags for embedding
-            import re
-            # Extract just the body content for embedding
-            body_match = re.search(r'<body>(.*?)</body>', ai_analysis, re.DOTALL)
-            if body_match:
-                ai_analysis = body_match.group(1).strip()
-            
             return {
                 "success": True,
-                "ai_analysis": ai_analysis,
+                "ai_analysis": _clean_ai_analysis(str(response[0])),
                 "function_calls_made": len(response[0].items) if hasattr(response[0], 'items') else 0
             }
             
@@ -404,76 +531,90 @@ Include these sections:
                 "error": str(e),
                 "ai_analysis": "AI analysis failed - falling back to traditional method"
             }
+        finally:
+            self._close_request_scope(scope_tokens)
     
-    async def generate_rebalance_plan(self, request: RebalancePlanRequest) -> RebalancePlanResponse:
-        """Generate portfolio rebalancing plan using SK reasoning"""
-        portfolio = request.portfolio
-        targets = request.targets
-        constraints = request.constraints
-        
-        # Get current market prices
-        symbols = [pos.symbol for pos in portfolio.positions]
-        prices = await self.get_current_prices(symbols)
-        
-        # Calculate current portfolio state
-        current_positions = {}
-        total_value = 0.0
-        
-        for position in portfolio.positions:
-            current_price = prices.get(position.symbol, 100.0)
-            position_value = position.quantity * current_price
-            
-            current_positions[position.symbol] = {
-                'quantity': position.quantity,
-                'value': position_value,
-                'price': current_price,
-                'weight': 0.0  # Will calculate after total
-            }
-            total_value += position_value
-        
-        # Calculate current weights
-        for symbol in current_positions:
-            current_positions[symbol]['weight'] = current_positions[symbol]['value'] / total_value
+    async def stream_rebalance_plan_with_ai(self, request: RebalancePlanRequest):
+        """
+        Stream the AI rebalancing plan as Server-Sent Events while it is generated.
+        Emits {"delta": ...} events per token chunk, then a final {"done": true, ...} event
+        carrying the cleaned analysis and the traditional plan.
+        """
+        if not self.chat_service:
+            yield _sse_event({"done": True, "success": False, "error": "Semantic Kernel chat service not initialized"})
+            return
         
-        # Generate trades to reach target allocation
-        trades = []
-        notes = []
-        turnover_used = 0.0
+        # One price fetch serves both plans; the traditional one needs no LLM, so it is computed
+        # during the model's latency
+        prices = await self.get_current_prices(_request_symbols(request))
+        plan_task = asyncio.create_task(self.generate_rebalance_plan(request, prices))
+        history, settings = self._build_ai_chat(request)
+        frames = asyncio.Queue()
         
-        for target_symbol, target_weight in targets.items():
-            target_value = total_value * target_weight
-            current_value = current_positions.get(target_symbol, {}).get('value', 0.0)
-            difference = target_value - current_value
-            
-            # Only trade if difference is significant and within turnover budget
-            if abs(difference) > constraints.minTradeValue and turnover_used < constraints.maxTurnover:
-                current_price = prices.get(target_symbol, 100.0)
-                quantity_needed = abs(difference) / current_price
+        async def produce():
+            # Scoped prices and valuations live in the producer task's own context, set and reset there
+            scope_tokens = await self._open_request_scope(request, prices)
+            parts = []
+            try:
+                async for chunks in self.chat_service.get_streaming_chat_message_contents(
+                    chat_history=history,
+                    settings=settings,
+                    kernel=self.kernel
+                ):
+                    for chunk in chunks:
+                        text = str(chunk)
+                        if text:
+                            parts.append(text)
+                            await frames.put(_sse_event({"delta": text}))
                 
-                trade = Trade(
-                    symbol=target_symbol,
-                    side="BUY" if difference > 0 else "SELL",
-                    quantity=round(quantity_needed, 2),
-                    estPrice=current_price,
-                    reason="Reduce overweight" if difference < 0 else "Increase underweight"
-                )
-                trades.append(trade)
-                
-                # Track turnover usage
-                turnover_used += abs(difference) / total_value
+                traditional_plan = await plan_task
+                await frames.put(_sse_event({
+                    "done": True,
+                    "ai_powered": True,
+                    "ai_analysis": _clean_ai_analysis("".join(parts)),
+                    "traditional_plan": _plan_summary(traditional_plan),
+                    "success": True
+                }))
                 
-                if turnover_used >= constraints.maxTurnover:
-                    notes.append("Turnover budget reached; some trades skipped.")
-                    break
+            except Exception as e:
+                logger.error(f"SK AI streaming error: {str(e)}")
+                await frames.put(_sse_event({
+                    "done": True,
+                    "error": str(e),
+                    "ai_analysis": "AI analysis failed - falling back to traditional method",
+                    "success": False
+                }))
+            finally:
+                self._close_request_scope(scope_tokens)
+            
+            # End-of-stream sentinel (skipped on cancellation, when nobody is reading)
+            await frames.put(None)
         
-        if len(trades) == 0:
-            notes.append("Portfolio is already well-balanced within constraints.")
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                frame = await frames.get()
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            # Client went away mid-stream - stop generating tokens nobody will read
+            if not producer.done():
+                producer.cancel()
+            if not plan_task.done():
+                plan_task.cancel()
+    
+    async def generate_rebalance_plan(self, request: RebalancePlanRequest, prices: Optional[Dict[str, float]] = None) -> RebalancePlanResponse:
+        """Generate portfolio rebalancing plan using SK reasoning; prices may be prefetched for _request_symbols"""
+        # Get current market prices - target-only symbols included, so new positions are sized at market
+        symbols = [pos.symbol for pos in request.portfolio.positions]
+        if prices is None:
+            prices = await self.get_current_prices(_request_symbols(request))
         
-        return RebalancePlanResponse(
-            currentValue=total_value,
-            trades=trades,
-            notes=notes
-        )
+        # Large plans are computed off the event loop so other requests keep being served
+        if len(symbols) + len(request.targets) >= PLAN_THREAD_MIN_ROWS:
+            return await asyncio.to_thread(_compute_plan, request, symbols, prices)
+        return _compute_plan(request, symbols, prices)
 
 # Initialize the SK RebalanceAgent
 rebalance_agent = SKRebalanceAgent()
@@ -526,6 +667,7 @@ async def agent_card():
         "endpoints": {
             "rebalance_plan": "/rebalance/plan",
             "rebalance_plan_ai": "/rebalance/plan/ai",
+            "rebalance_plan_ai_stream": "/rebalance/plan/ai/stream",
             "health": "/health", 
             "sk_chat": "/sk/chat"
         },
@@ -537,7 +679,7 @@ async def agent_card():
             "ai.reasoning"
         ],
         "port": 8012,
-        "streams": False,
+        "streams": True,
         "auth": "none",
         "framework": "semantic_kernel"
     }
@@ -555,26 +697,34 @@ async def rebalance_plan(request: RebalancePlanRequest):
 async def rebalance_plan_ai(request: RebalancePlanRequest):
     """Generate portfolio rebalancing plan with AI-powered analysis and natural language explanations"""
     try:
-        result = await rebalance_agent.generate_rebalance_plan_with_ai(request)
-        
-        # Also get the traditional plan for structured data
-        traditional_plan = await rebalance_agent.generate_rebalance_plan(request)
+        # Also get the traditional plan for structured data - it runs while the LLM is thinking,
+        # so it adds nothing to the response time. Both plans share one price fetch
+        prices = await rebalance_agent.get_current_prices(_request_symbols(request))
+        result, traditional_plan = await asyncio.gather(
+            rebalance_agent.generate_rebalance_plan_with_ai(request, prices),
+            rebalance_agent.generate_rebalance_plan(request, prices),
+        )
         
         return {
             "ai_powered": True,
             "ai_analysis": result.get("ai_analysis", ""),
             "function_calls_made": result.get("function_calls_made", 0),
-            "traditional_plan": {
-                "currentValue": traditional_plan.currentValue,
-                "trades": [trade.dict() for trade in traditional_plan.trades],
-                "notes": traditional_plan.notes
-            },
+            "traditional_plan": _plan_summary(traditional_plan),
             "success": result.get("success", False)
         }
     except Exception as e:
         logger.error(f"AI rebalancing endpoint error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/rebalance/plan/ai/stream")
+async def rebalance_plan_ai_stream(request: RebalancePlanRequest):
+    """Stream the AI-powered rebalancing plan token by token via Server-Sent Events"""
+    return StreamingResponse(
+        rebalance_agent.stream_rebalance_plan_with_ai(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/sk/chat")
 async def sk_chat_endpoint(message: dict):
     """Semantic Kernel powered chat for portfolio advice"""
@@ -610,4 +760,13 @@ if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("REBALANCE_AGENT_PORT", "8012"))
     print(f"🚀 Starting Semantic Kernel RebalanceAgent on port {port}...")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # Workers are separate processes; REDIS_URL lets them share fetched prices
+    uvicorn.run(
+        "agents.rebalance.main:app",
+        app_dir=_REPO_ROOT,
+        host="0.0.0.0",
+        port=port,
+        workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+        loop="uvloop",
+        http="httptools"
+    )
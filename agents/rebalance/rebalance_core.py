@@ -0,0 +1,82 @@
+"""
+Rebalancing math for the RebalanceAgent
+Pure, fully typed numeric routines with no FastAPI or Semantic Kernel dependency
+"""
+
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+def value_positions(symbols: List[str], quantities: Iterable[float], prices: Dict[str, float]) -> Tuple[Dict[str, int], np.ndarray, float]:
+    """Portfolio as parallel arrays: symbol -> row index, market value per row, and the total value"""
+    count = len(symbols)
+    values = np.fromiter(quantities, dtype=np.float64, count=count) * np.fromiter(
+        (prices.get(s, 100.0) for s in symbols), dtype=np.float64, count=count
+    )
+    return {symbol: row for row, symbol in enumerate(symbols)}, values, float(values.sum())
+
+def held_values(index: Dict[str, int], values: np.ndarray, symbols: List[str]) -> np.ndarray:
+    """Market value of each of symbols, 0.0 where the portfolio doesn't hold it"""
+    rows = np.fromiter((index.get(s, -1) for s in symbols), dtype=np.intp, count=len(symbols))
+    held = rows >= 0
+    current = np.zeros(len(symbols))
+    current[held] = values[rows[held]]
+    return current
+
+def plan_trades(
+    index: Dict[str, int],
+    values: np.ndarray,
+    total_value: float,
+    targets: Dict[str, float],
+    prices: Dict[str, float],
+    max_turnover: float,
+    min_trade_value: float,
+) -> Tuple[List[Tuple[str, float, float, float]], bool]:
+    """Size (symbol, difference, quantity, price) trades toward targets; flag if the turnover budget ran out"""
+    symbols = list(targets)
+    count = len(symbols)
+    weights = np.fromiter(targets.values(), dtype=np.float64, count=count)
+    current = held_values(index, values, symbols)
+    target_prices = np.fromiter((prices.get(s, 100.0) for s in symbols), dtype=np.float64, count=count)
+    
+    # Every target's gap, trade size and turnover share in one vectorized pass
+    diffs = total_value * weights - current
+    abs_diffs = np.abs(diffs)
+    quantities = abs_diffs / target_prices
+    turnover = abs_diffs / total_value if total_value else np.zeros(count)
+    
+    # Nothing to do when the budget is spent or no gap is significant - the common case for a
+    # portfolio that is already near its targets
+    if max_turnover <= 0:
+        return [], False
+    selected = np.flatnonzero(abs_diffs > min_trade_value)
+    if not selected.size:
+        return [], False
+    
+    # Spend the turnover budget on the largest gaps first: the running total is a cumsum and the
+    # first trade that reaches the budget is found by binary search (turnover >= 0, so the running
+    # total never decreases)
+    selected = selected[np.argsort(-abs_diffs[selected], kind="stable")]
+    cutoff = int(np.searchsorted(np.cumsum(turnover[selected]), max_turnover))
+    budget_reached = cutoff < len(selected)
+    if budget_reached:
+        selected = selected[:cutoff + 1]
+    
+    trades = list(zip(
+        [symbols[i] for i in selected.tolist()],
+        diffs[selected].tolist(),
+        quantities[selected].tolist(),
+        target_prices[selected].tolist(),
+    ))
+    return trades, budget_reached
+
+def normalize_prices(prices_data: Dict[str, Any]) -> Dict[str, float]:
+    """Flatten a PricingAgent prices map to symbol -> price, leaving out symbols it couldn't price"""
+    # Handle both formats: {"AAPL": 256.33} or {"AAPL": {"price": 256.33, "currency": "USD"}}.
+    # A response uses one format throughout, so it is detected once from the first value.
+    # Unpriced symbols come back as {"error": ..., "symbol": ...}; they are dropped rather than
+    # given a placeholder, so callers apply their own default and it never reaches the cache
+    first = next(iter(prices_data.values()), None)
+    if isinstance(first, dict):
+        return {symbol: value["price"] for symbol, value in prices_data.items() if "price" in value}
+    return dict(prices_data)
@@ -0,0 +1,91 @@
+"""
+Tests for the OrchestratorAgent service
+Run from the repository root: python -m pytest -q
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("semantic_kernel")
+
+from agents.orchestrator import main
+
+PLUGIN_NAMES = {
+    "StockPricingPlugin",
+    "PortfolioRebalancingPlugin",
+    "MarketInsightsPlugin",
+    "TransactionHistoryPlugin",
+    "MarketSentimentPlugin",
+}
+
+
+async def _idle(self):
+    """Stand-in for the background pollers so startup makes no network calls"""
+    await asyncio.Event().wait()
+
+
+def test_startup_registers_and_warms_plugins(monkeypatch):
+    monkeypatch.setenv("AZURE_OPENAI_ENDPOINT", "https://example.openai.azure.com")
+    monkeypatch.setenv("AZURE_OPENAI_API_KEY", "test-key")
+    monkeypatch.delenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT", raising=False)
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    monkeypatch.setattr(main.OrchestratorService, "_price_poller", _idle)
+    monkeypatch.setattr(main.OrchestratorService, "_discovery_refresher", _idle)
+
+    warmed = []
+
+    async def warmup(self):
+        warmed.append(type(self).__name__)
+
+    monkeypatch.setattr(main.StockPricingPlugin, "warmup", warmup)
+    monkeypatch.setattr(main.PortfolioRebalancingPlugin, "warmup", warmup)
+
+    async def run():
+        service = main.OrchestratorService()
+        await service.startup()
+        try:
+            assert set(service.kernel.plugins) == PLUGIN_NAMES
+            assert len(service._plugins) == main.EXPECTED_PLUGIN_COUNT
+            assert sorted(warmed) == ["PortfolioRebalancingPlugin", "StockPricingPlugin"]
+        finally:
+            await service.shutdown()
+        assert service._plugins == []
+
+    asyncio.run(run())
+
+
+class _ConstantEmbedding:
+    """Embeds every text to the same vector, the worst case for a similarity-only cache"""
+
+    async def generate_embeddings(self, texts):
+        return [[1.0, 0.0, 0.0] for _ in texts]
+
+
+def test_semantic_cache_requires_matching_tickers():
+    service = main.OrchestratorService()
+    service.embed_service = _ConstantEmbedding()
+    cached = {"response": "AAPL is $230", "agent": "SK_OrchestratorAgent_AutoFunctions"}
+
+    async def run():
+        embedding, _ = await service._semantic_lookup("price of aapl")
+        service.response_cache["price of aapl"] = cached
+        service._semantic_remember("price of aapl", embedding)
+
+        _, other_ticker = await service._semantic_lookup("price of msft")
+        _, paraphrase = await service._semantic_lookup("aapl price")
+        return other_ticker, paraphrase
+
+    other_ticker, paraphrase = asyncio.run(run())
+    assert other_ticker is None
+    assert paraphrase == cached
+
+
+def test_cache_key_depends_on_session_history():
+    service = main.OrchestratorService()
+    assert service._history_fingerprint("fresh") == ""
+
+    chat_history = service.get_or_create_chat_history("busy")
+    chat_history.add_user_message("I hold 10 AMZN")
+    chat_history.add_assistant_message("Noted.")
+    assert service._history_fingerprint("busy") != ""
@@ -0,0 +1,67 @@
+"""
+Tests for the RebalanceAgent's rebalancing math
+Run from the repository root: python -m pytest -q
+"""
+import pytest
+
+pytest.importorskip("numpy")
+
+from agents.rebalance.rebalance_core import normalize_prices, plan_trades, value_positions
+
+PRICES = {"A": 100.0, "B": 50.0, "C": 25.0}
+
+
+def _plan(holdings, targets, max_turnover, min_trade_value=0.0):
+    """Value holdings ({symbol: quantity}) at PRICES and plan trades toward targets"""
+    symbols = list(holdings)
+    index, values, total_value = value_positions(symbols, holdings.values(), PRICES)
+    return plan_trades(index, values, total_value, targets, PRICES, max_turnover, min_trade_value)
+
+
+def test_trade_that_exactly_reaches_the_budget_is_kept_and_flagged():
+    # 1,000 of A; each target is 100 away, i.e. 0.1 turnover apiece
+    trades, budget_reached = _plan({"A": 10}, {"A": 0.9, "B": 0.1}, max_turnover=0.1)
+    assert [symbol for symbol, *_ in trades] == ["A"]
+    assert budget_reached
+
+    trades, budget_reached = _plan({"A": 10}, {"A": 0.9, "B": 0.1}, max_turnover=0.2)
+    assert [symbol for symbol, *_ in trades] == ["A", "B"]
+    assert budget_reached
+
+
+def test_no_budget_means_no_trades():
+    for max_turnover in (0.0, -1.0):
+        assert _plan({"A": 10}, {"A": 0.5, "B": 0.5}, max_turnover) == ([], False)
+
+
+def test_empty_portfolio_plans_nothing():
+    assert _plan({}, {"A": 0.5, "B": 0.5}, max_turnover=0.2, min_trade_value=100.0) == ([], False)
+    assert _plan({"A": 0}, {"A": 1.0}, max_turnover=0.2) == ([], False)
+
+
+def test_budget_goes_to_the_largest_gaps_first():
+    # Gaps: A -500, B +200, C +300
+    targets = {"A": 0.5, "B": 0.2, "C": 0.3}
+
+    trades, budget_reached = _plan({"A": 10}, targets, max_turnover=2.0)
+    assert trades == [("A", -500.0, 5.0, 100.0), ("C", 300.0, 12.0, 25.0), ("B", 200.0, 4.0, 50.0)]
+    assert not budget_reached
+
+    trades, budget_reached = _plan({"A": 10}, targets, max_turnover=0.6)
+    assert [symbol for symbol, *_ in trades] == ["A", "C"]
+    assert budget_reached
+
+
+def test_gaps_within_min_trade_value_are_skipped():
+    trades, budget_reached = _plan({"A": 10}, {"A": 0.5, "B": 0.2, "C": 0.3}, max_turnover=2.0, min_trade_value=250.0)
+    assert [symbol for symbol, *_ in trades] == ["A", "C"]
+    assert not budget_reached
+
+
+def test_unpriced_symbols_are_left_out():
+    prices = normalize_prices({
+        "A": {"price": 101.5, "currency": "USD"},
+        "B": {"error": "not found", "symbol": "B"},
+    })
+    assert prices == {"A": 101.5}
+    assert normalize_prices({"A": 101.5}) == {"A": 101.5}